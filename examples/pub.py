@@ -1,4 +1,5 @@
 import logging 
+from concurrent.futures import ThreadPoolExecutor
 
 from sqs_client.factories import ReplyQueueFactory, PublisherFactory
 from sqs_client.message import RequestMessage
@@ -28,21 +29,25 @@ publisher = PublisherFactory(
 
 messages = []
 for i in range(0, 10):
-    print("Sending message...")
     message = RequestMessage(
-        body='Hello world!!' + str(i),
+        body=f'Hello world!!{i}',
         queue_url=config['queue_url'],
         reply_queue=reply_queue
     )
-    publisher.send_message(message)
     messages.append(message)
 
-for message in messages:
+print("Sending messages...")
+publisher.send_messages(messages)
+
+def get_response(message):
     try:
-        response = message.get_response(timeout=20)
-        print(response.body)
+        return message.get_response(timeout=20).body
     except ReplyTimeout:
-        print("Timeout")
+        return "Timeout"
+
+with ThreadPoolExecutor(max_workers=min(32, len(messages))) as executor:
+    for response in executor.map(get_response, messages):
+        print(response)
 
 reply_queue.remove_queue()   
 
@@ -1,5 +1,5 @@
 from sqs_client.subscriber import MessagePoller 
-from sqs_client.contracts import MessageHandler
+from sqs_client.contracts import BatchMessageHandler
 from sqs_client.factories import SubscriberFactory, PublisherFactory
 
 config = {
@@ -22,12 +22,12 @@ publisher = PublisherFactory(
     region_name=config['region_name']
 ).build()
 
-class TestHandler(MessageHandler):
+class TestHandler(BatchMessageHandler):
     
-    def process_message(self, message):
-        response = message.body + ' successfully processed!! '
-        print(response)
-        return response
+    def process_messages(self, messages):
+        responses = [message.body + ' successfully processed!! ' for message in messages]
+        print(responses)
+        return responses
 
 poll = MessagePoller(
     handler=TestHandler(),
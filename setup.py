@@ -12,5 +12,6 @@ setup(
     description=(""),
     license="BSD",
     packages=["sqs_client"],
-    install_requires=['boto3', 'multiprocessing-logging'],
+    install_requires=['boto3'],
+    extras_require={'async': ['aiobotocore', 'uvloop']},
 )
\ No newline at end of file
@@ -1,7 +1,32 @@
+from functools import cached_property
+from threading import Lock
+
 import boto3
+from botocore.config import Config
 
 from sqs_client.contracts import SqsConnection as SqsConnectionBase
 
+# A single session amortizes credential and endpoint resolution across every
+# connection in the process. Sessions are not thread-safe, so clients and
+# resources are created under a lock.
+_SESSION = boto3.session.Session()
+_SESSION_LOCK = Lock()
+
+# Size of the keep-alive pool of the shared connection.
+MAX_POOL_CONNECTIONS = 64
+
+# Publishers, subscribers, the reply queue and the sweeper all share a
+# connection, so give it a larger keep-alive pool. Each concurrent poller of
+# a Subscriber (num_pollers) holds one of these connections during a long
+# poll. The read timeout must outlast a 20 second long poll.
+_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": 5},
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=25,
+)
+
 
 class SqsConnection(SqsConnectionBase):
     def __init__(
@@ -10,41 +35,60 @@ class SqsConnection(SqsConnectionBase):
         access_key: str = None,
         secret_key: str = None,
         endpoint_url: str = None,
+        config: Config = None,
     ):
         self._access_key = access_key
         self._secret_key = secret_key
         self._endpoint_url = endpoint_url
         self._region_name = region_name
+        self._config = config or _CONFIG
         self._queue_url = None
-        self._load_resource()
-        self._load_client()
+        self._queues = {}
+
+    @cached_property
+    def client(self):
+        return self._load_client()
+
+    @cached_property
+    def resource(self):
+        return self._load_resource()
 
     def set_queue(self, queue_url: str):
         self._queue_url = queue_url
 
     def get_queue_resource(self, queue_url: str = None):
-        self._set_queue(queue_url)
-        return self.resource.Queue(self._queue_url)
-
-    def _set_queue(self, queue_url: str = None):
-        self._queue_url = queue_url if queue_url else self._queue_url
-        if not self._queue_url:
+        # Connections are shared, so a URL passed here does not replace the default queue.
+        queue_url = queue_url or self._queue_url
+        if not queue_url:
             raise Exception("Queue is not defined.")
+        queue = self._queues.get(queue_url)
+        if not queue:
+            queue = self._queues[queue_url] = self.resource.Queue(queue_url)
+        return queue
 
     def _load_resource(self):
-        session = boto3.Session(
-            aws_access_key_id=self._access_key,
-            aws_secret_access_key=self._secret_key,
-        )
-        self.resource = session.resource(
-            "sqs", endpoint_url=self._endpoint_url, region_name=self._region_name
-        )
+        with _SESSION_LOCK:
+            return _SESSION.resource("sqs", **self._get_service_kwargs())
 
     def _load_client(self):
-        self.client = boto3.client(
-            "sqs",
-            aws_access_key_id=self._access_key,
-            aws_secret_access_key=self._secret_key,
-            endpoint_url=self._endpoint_url,
-            region_name=self._region_name,
-        )
+        with _SESSION_LOCK:
+            return _SESSION.client("sqs", **self._get_service_kwargs())
+
+    def get_client_params(self) -> dict:
+        """
+        Return the credentials, region and endpoint used to build SQS clients.
+
+        This lets other SQS clients, such as an aiobotocore client, be built with the same settings.
+        """
+        params = {
+            "aws_access_key_id": self._access_key,
+            "aws_secret_access_key": self._secret_key,
+            "region_name": self._region_name,
+        }
+        # Only pass a custom endpoint when one is set, e.g. for a local SQS emulator.
+        if self._endpoint_url:
+            params["endpoint_url"] = self._endpoint_url
+        return params
+
+    def _get_service_kwargs(self) -> dict:
+        return {**self.get_client_params(), "config": self._config}
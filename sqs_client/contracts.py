@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 
 class SqsConnection(ABC):
@@ -31,13 +32,28 @@ class Subscriber(ABC):
         pass
 
     @abstractmethod
-    def receive_messages(self):
+    def receive_messages(
+        self,
+        return_none=False,
+        message_attribute_names=None,
+        wait_time_seconds=None,
+        max_number_of_messages=None,
+    ):
+        pass
+
+    @abstractmethod
+    def stream(self, return_none=False, message_attribute_names=None):
         pass
 
     @abstractmethod
     def chunk(self, num_messages=500, limit_seconds=30):
         pass
 
+    @property
+    def visibility_timeout(self):
+        """The visibility timeout of the received messages in seconds, None if unknown."""
+        return None
+
 
 class Message(ABC):
     @property
@@ -72,6 +88,12 @@ class MessageHandler(ABC):
         pass
 
 
+class BatchMessageHandler(ABC):
+    @abstractmethod
+    def process_messages(self, messages: List[Message]) -> list:
+        pass
+
+
 class RequestMessage(ABC):
     @abstractmethod
     def get_params(self) -> dict:
@@ -96,13 +118,21 @@ class MessageList(ABC):
         pass
 
     @abstractmethod
-    def remove(self, message_id: int):
+    def remove(self, message_id: str):
         pass
 
     @abstractmethod
     def delete(self):
         pass
 
+    @abstractmethod
+    def delete_except(self, message_ids):
+        pass
+
+    @abstractmethod
+    def change_visibility(self, visibility_timeout: int):
+        pass
+
 
 class ReplyQueue(ABC):
     @abstractmethod
@@ -136,3 +166,22 @@ class Publisher(ABC):
     @abstractmethod
     def send_message(self, request_message: RequestMessage):
         pass
+
+    def send_messages(self, request_messages: List[RequestMessage]) -> dict:
+        """
+        Send several messages, one at a time unless overridden.
+
+        Returns:
+            dict: The "Successful" and "Failed" entries, whose Id is the index of the message.
+        """
+        result = {"Successful": [], "Failed": []}
+        for index, request_message in enumerate(request_messages):
+            try:
+                self.send_message(request_message)
+            except Exception as e:
+                result["Failed"].append(
+                    {"Id": str(index), "SenderFault": True, "Code": e.__class__.__name__, "Message": str(e)}
+                )
+            else:
+                result["Successful"].append({"Id": str(index)})
+        return result
@@ -1,2 +1,10 @@
 class ReplyTimeout(Exception):
     pass
+
+
+class MessageNotSent(Exception):
+    pass
+
+
+class OutboxWriteFailed(Exception):
+    pass
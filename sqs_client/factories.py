@@ -1,25 +1,49 @@
+from functools import lru_cache
+
 from sqs_client.connection import SqsConnection
 from sqs_client.idle_queue_sweeper import IdleQueueSweeper
 from sqs_client.publisher import Publisher
-from sqs_client.reply_queue import ReplyQueue
+from sqs_client.reply_queue import AsyncReplyQueue, ReplyQueue
 from sqs_client.subscriber import Subscriber
 
 
+# boto3 clients are expensive to build, so components configured with the same
+# region, credentials and endpoint share one connection (and its HTTP pool).
+@lru_cache(maxsize=None)
+def build_sqs_connection(
+    region_name=None, access_key=None, secret_key=None, endpoint_url=None, config=None
+):
+    return SqsConnection(
+        access_key=access_key,
+        secret_key=secret_key,
+        endpoint_url=endpoint_url,
+        region_name=region_name,
+        config=config,
+    )
+
+
 class SqsConnectionFactory:
     def __init__(
-        self, region_name=None, access_key=None, secret_key=None, endpoint_url=None
+        self,
+        region_name=None,
+        access_key=None,
+        secret_key=None,
+        endpoint_url=None,
+        config=None,
     ):
         self._region_name = region_name
         self._access_key = access_key
         self._secret_key = secret_key
         self._endpoint_url = endpoint_url
+        self._config = config
 
     def build(self):
-        return SqsConnection(
-            access_key=self._access_key,
-            secret_key=self._secret_key,
-            endpoint_url=self._endpoint_url,
-            region_name=self._region_name,
+        return build_sqs_connection(
+            self._region_name,
+            self._access_key,
+            self._secret_key,
+            self._endpoint_url,
+            self._config,
         )
 
 
@@ -31,20 +55,30 @@ class BaseFactory:
         secret_key=None,
         endpoint_url=None,
         sqs_connection_factory=SqsConnectionFactory,
+        sqs_connection=None,
+        config=None,
     ):
         self._region_name = region_name
         self._access_key = access_key
         self._secret_key = secret_key
         self._endpoint_url = endpoint_url
+        self._config = config
         self._sqs_connection_factory = sqs_connection_factory
+        self._sqs_connection = sqs_connection
 
     def build(self):
         raise NotImplementedError
 
     def _build_sqs_connection(self):
-        return self._sqs_connection_factory(
-            self._region_name, self._access_key, self._secret_key, self._endpoint_url
-        ).build()
+        if not self._sqs_connection:
+            self._sqs_connection = self._sqs_connection_factory(
+                self._region_name,
+                self._access_key,
+                self._secret_key,
+                self._endpoint_url,
+                config=self._config,
+            ).build()
+        return self._sqs_connection
 
 
 class SubscriberFactory(BaseFactory):
@@ -52,12 +86,16 @@ class SubscriberFactory(BaseFactory):
         super().__init__(*args, **kwargs)
         self._queue_url = queue_url
 
-    def build(self, max_number_of_messages=10, visibility_timeout=30):
+    def build(
+        self, max_number_of_messages=10, visibility_timeout=30, wait_time_seconds=20, num_pollers=1
+    ):
         return Subscriber(
             sqs_connection=self._build_sqs_connection(),
             queue_url=self._queue_url,
             max_number_of_messages=max_number_of_messages,
             visibility_timeout=visibility_timeout,
+            wait_time_seconds=wait_time_seconds,
+            num_pollers=num_pollers,
         )
 
 
@@ -83,6 +121,8 @@ class ReplyQueueFactory(BaseFactory):
         heartbeat_interval_seconds=60,
         list_queues_max_results=1000,
         idle_queue_retention_period=120,
+        response_cache=None,
+        reply_queue_async=False,
         subscriber_factory=SubscriberFactory,
         publisher_factory=PublisherFactory,
         **kwargs
@@ -95,33 +135,50 @@ class ReplyQueueFactory(BaseFactory):
         self._heartbeat_interval_seconds = heartbeat_interval_seconds
         self._list_queues_max_results = list_queues_max_results
         self._idle_queue_retention_period = idle_queue_retention_period
+        self._response_cache = response_cache
+        self._reply_queue_class = AsyncReplyQueue if reply_queue_async else ReplyQueue
         self._subscriber_factory = subscriber_factory
         self._publisher_factory = publisher_factory
 
     def build(self):
-        return ReplyQueue(
+        sqs_connection = self._build_sqs_connection()
+        return self._reply_queue_class(
             name=self._name,
-            sqs_connection=self._build_sqs_connection(),
-            subscriber=self._build_subscriber(),
-            idle_queue_sweeper=self._build_idle_queue_sweeper(),
+            sqs_connection=sqs_connection,
+            subscriber=self._build_subscriber(sqs_connection),
+            idle_queue_sweeper=self._build_idle_queue_sweeper(sqs_connection),
+            message_retention_period=self._message_retention_period,
+            seconds_before_cleaning=self._seconds_before_cleaning,
+            num_messages_before_cleaning=self._num_messages_before_cleaning,
             heartbeat_interval_seconds=self._heartbeat_interval_seconds,
+            response_cache=self._response_cache,
         )
 
-    def _build_idle_queue_sweeper(self):
+    def _build_idle_queue_sweeper(self, sqs_connection):
         return IdleQueueSweeper(
-            sqs_connection=self._build_sqs_connection(),
-            subscriber=self._build_subscriber(),
-            publisher=self._build_publisher(),
+            sqs_connection=sqs_connection,
+            subscriber=self._build_subscriber(sqs_connection),
+            publisher=self._build_publisher(sqs_connection),
             list_queues_max_results=self._list_queues_max_results,
             idle_queue_retention_period=self._idle_queue_retention_period,
         )
 
-    def _build_subscriber(self):
+    # Subscribers are built per consumer because they hold the URL of the queue
+    # they poll; only the connection is shared.
+    def _build_subscriber(self, sqs_connection):
         return self._subscriber_factory(
-            self._region_name, self._access_key, self._secret_key, self._endpoint_url
+            self._region_name,
+            self._access_key,
+            self._secret_key,
+            self._endpoint_url,
+            sqs_connection=sqs_connection,
         ).build()
 
-    def _build_publisher(self):
+    def _build_publisher(self, sqs_connection):
         return self._publisher_factory(
-            self._region_name, self._access_key, self._secret_key, self._endpoint_url
+            self._region_name,
+            self._access_key,
+            self._secret_key,
+            self._endpoint_url,
+            sqs_connection=sqs_connection,
         ).build()
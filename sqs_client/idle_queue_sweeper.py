@@ -1,15 +1,41 @@
 import logging
-from datetime import datetime
-from typing import List
-from multiprocessing import Process
-from time import sleep
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from queue import Queue
+from typing import Iterator, List
+from threading import Event, Lock, Thread
 
 from sqs_client.contracts import IdleQueueSweeper as IdleQueueSweeperBase
-from sqs_client.contracts import Publisher, SqsConnection, Subscriber
+from sqs_client.contracts import MessageList, Publisher, SqsConnection, Subscriber
 from sqs_client.message import RequestMessage
+from sqs_client.publisher import MAX_BATCH_SIZE
 from sqs_client.utils import timestamp
 
-TRIGGER_MESSAGE_BODY = "SweepingTrigger"
+# Interned, like short message bodies, so matching a trigger is an identity
+# check in the string comparison.
+TRIGGER_MESSAGE_BODY = sys.intern("SweepingTrigger")
+SWEEPER_MAX_WORKERS = 32
+# Maximum number of queue URLs received but not yet swept. The receiving thread
+# blocks when the buffer is full.
+SWEEPER_BUFFER_SIZE = 100
+
+
+class _SweepBatch:
+    """Delete a batch of sweeper messages once every queue it lists has been swept."""
+
+    def __init__(self, messages: MessageList, pending: int):
+        self._messages = messages
+        self._pending = pending
+        self._lock = Lock()
+
+    def done(self):
+        """Mark one queue of the batch as swept, deleting the batch after the last one."""
+        with self._lock:
+            self._pending -= 1
+            if self._pending:
+                return
+        self._messages.delete()
 
 
 class IdleQueueSweeper(IdleQueueSweeperBase):
@@ -27,14 +53,14 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
 
     Key Concepts:
     --------------------------------------------
-    1. Sweeper Queue and Trigger Process:
-       The class implements a sweeper queue and a trigger process to initiate the sweeping process.
-       The trigger process runs in the background and periodically sends a trigger message to the
+    1. Sweeper Queue and Trigger Thread:
+       The class implements a sweeper queue and a trigger thread to initiate the sweeping process.
+       The trigger thread runs in the background and periodically sends a trigger message to the
        sweeper queue. This trigger message serves as a signal to initiate the actual sweeping process.
 
     2. Distributed Sweeping:
-       The sweeper process listens to messages from the sweeper queue. When a trigger message is received,
-       the sweeper process fetches the list of queues in the SQS system and publishes each queue URL as a
+       The sweeper thread listens to messages from the sweeper queue. When a trigger message is received,
+       the sweeper thread fetches the list of queues in the SQS system and publishes each queue URL as a
        message to the sweeper queue. This distributed approach ensures that the sweeping work is divided
        among active clients, promoting scalability in distributed systems.
 
@@ -46,19 +72,21 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
 
     Class Functionality:
     -------------------
-    The `IdleQueueSweeper` class is equipped with two processes to manage the queue sweeping:
+    The `IdleQueueSweeper` class is equipped with two daemon threads to manage the queue sweeping.
+    Both only wait on network I/O, so threads are used rather than separate processes:
 
-    1. Trigger Process:
-       The trigger process runs continuously and triggers the sweeping process at regular intervals.
+    1. Trigger Thread:
+       The trigger thread runs continuously and triggers the sweeping process at regular intervals.
        It checks the current time and initiates the sweeping process if the conditions are met.
        By triggering the process at regular intervals, the `IdleQueueSweeper` class ensures consistent
        monitoring and cleaning of idle queues in a distributed setup.
 
-    2. Sweeper Process:
-       The sweeper process acts as a worker that listens to messages from the sweeper queue.
-       Upon receiving a trigger message, the sweeper process fetches the list of queues in the SQS system
+    2. Sweeper Thread:
+       The sweeper thread acts as a worker that listens to messages from the sweeper queue.
+       Upon receiving a trigger message, the sweeper thread fetches the list of queues in the SQS system
        and sends each queue URL as a message to the sweeper queue. This distribution of tasks ensures that
        multiple instances or processes collaborate to clean up idle queues effectively.
+       Received queue URLs are checked by a pool of worker threads fed through a bounded buffer.
 
     Sweeping Process:
     -----------------
@@ -69,7 +97,7 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
     Note:
     -----
     The `IdleQueueSweeper` class efficiently manages idle queue monitoring and cleaning in distributed
-    systems by utilizing a combination of a sweeper queue, trigger process, and distributed sweeping.
+    systems by utilizing a combination of a sweeper queue, trigger thread, and distributed sweeping.
     It is optimized for scenarios where multiple instances or processes need to collaboratively monitor and
     clean up idle queues in an SQS system within a distributed environment.
     """
@@ -99,6 +127,9 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
         self._list_queues_max_results = list_queues_max_results
         self._idle_queue_retention_period = idle_queue_retention_period
         self._request_message_class = request_message_class
+        self._active_until = {}
+        self._cached_queues = None
+        self._stop_event = Event()
         self._logger = logging.getLogger()
 
     def set_name(self, name):
@@ -109,6 +140,11 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
             name (str): The name of the sweeper queue.
         """
         self._name = name
+        self._queue_name = name + "sweeper.fifo"
+        self._list_queues_params = {
+            "QueueNamePrefix": name,
+            "PaginationConfig": {"PageSize": self._list_queues_max_results},
+        }
 
     def get_queue_name(self) -> str:
         """
@@ -117,46 +153,67 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
         Returns:
             str: The name of the sweeper queue.
         """
-        return self._name + "sweeper.fifo"
+        return self._queue_name
 
     def start(self):
-        """Start the idle queue sweeper process."""
+        """
+        Start the idle queue sweeper process.
+
+        Each run gets its own stop event and buffer, so that a run still finishing its long poll
+        after `stop` neither keeps running nor hands its queues to the workers of the next run.
+        """
         self._create_queue()
-        self._start_trigger_process()
-        self._start_sweeper_process()
+        self._stop_event = Event()
+        sweep_queue = Queue(maxsize=SWEEPER_BUFFER_SIZE)
+        self._start_trigger_thread(self._stop_event)
+        self._start_sweeper_thread(self._stop_event, sweep_queue)
 
     def stop(self):
         """Stop the idle queue sweeper process."""
-        self._trigger_process.terminate()
-        self._trigger_process.join()
-        self._sweeper_process.terminate()
-        self._sweeper_process.join()
-
-    def _start_trigger_process(self):
-        """Start the trigger process."""
-        self._trigger_process = Process(target=self._trigger_sweeper)
-        self._trigger_process.daemon = True
-        self._trigger_process.start()
-
-    def _start_sweeper_process(self):
-        """Start the sweeper process."""
-        self._sweeper_process = Process(target=self._start_sweeper)
-        self._sweeper_process.daemon = True
-        self._sweeper_process.start()
-
-    def _trigger_sweeper(self):
-        """Periodically trigger the idle queue sweeper."""
-        minutes = list(range(0, 60, 2))
+        self._stop_event.set()
+
+    def _start_trigger_thread(self, stop_event: Event):
+        """Start the trigger thread."""
+        self._trigger_thread = Thread(target=self._trigger_sweeper, args=(stop_event,))
+        self._trigger_thread.daemon = True
+        self._trigger_thread.start()
+
+    def _start_sweeper_thread(self, stop_event: Event, sweep_queue: Queue):
+        """
+        Start the sweeper thread.
+
+        Sweeping is network-bound, so a daemon thread is enough and avoids forking a whole interpreter.
+        """
+        self._sweeper_thread = Thread(target=self._start_sweeper, args=(stop_event, sweep_queue))
+        self._sweeper_thread.daemon = True
+        self._sweeper_thread.start()
+
+    def _trigger_sweeper(self, stop_event: Event):
+        """
+        Periodically trigger the idle queue sweeper.
+
+        The trigger fires at the start of every even minute, so that clients across the fleet
+        send it at the same time. Between triggers the thread waits on the stop event.
+
+        Args:
+            stop_event (Event): The stop event of this run.
+        """
         while True:
             now = datetime.now()
-            if now.minute in minutes and now.second == 0:
-                self._sweeper()
-            sleep(1)
+            next_trigger = now.replace(second=0, microsecond=0) + timedelta(
+                minutes=2 - now.minute % 2
+            )
+            remaining = (next_trigger - now).total_seconds()
+            while remaining > 0:
+                if stop_event.wait(remaining):
+                    return
+                remaining = (next_trigger - datetime.now()).total_seconds()
+            self._sweeper()
             
     def _sweeper(self):
         """Send a trigger message to initiate the sweeping process."""
         try:
-            self._logger.info("Triggering Idle Queue Sweeper at " + str(datetime.now()))
+            self._logger.info("Triggering Idle Queue Sweeper at %s", datetime.now())
             message = self._request_message_class(
                 body=TRIGGER_MESSAGE_BODY,
                 queue_url=self._queue_url,
@@ -170,62 +227,196 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
         """Create the sweeper queue."""
         try:
             self._logger.info("Creating Idle Queue Sweeper Queue")
-            self._queue_url = self._connection.resource.create_queue(
+            self._queue_url = self._connection.client.create_queue(
                 QueueName=self.get_queue_name(),
                 Attributes={
                     "FifoQueue": "true",
                     "ContentBasedDeduplication": "true",
                     "ReceiveMessageWaitTimeSeconds": "20",  # long polling
                 },
-            ).url
+            )["QueueUrl"]
         except Exception as e:
             error = e.__class__.__name__
             if error != "QueueNameExists":
                 raise e
             self._queue_url = self._connection.client.get_queue_url(
                 QueueName=self.get_queue_name()
-            )
+            )["QueueUrl"]
+
+    def _start_sweeper(self, stop_event: Event, sweep_queue: Queue):
+        """
+        Start the sweeping process.
 
-    def _start_sweeper(self):
-        """Start the sweeping process."""
+        This thread only receives messages: queue URLs are handed to a pool of worker
+        threads through a bounded buffer, so a slow queue check does not hold back the
+        next receive call. Runs until the sweeper is stopped, checking for the stop
+        signal after every receive call.
+
+        Args:
+            stop_event (Event): The stop event of this run.
+            sweep_queue (Queue): The buffer between this thread and the workers of this run.
+        """
         self._subscriber.set_queue(self._queue_url)
-        for messages in self._subscriber.receive_messages():
+        workers = [
+            Thread(target=self._sweep_worker, args=(sweep_queue,), daemon=True)
+            for _ in range(SWEEPER_MAX_WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            self._process_sweeper_messages(
+                self._subscriber.receive_messages(return_none=True), stop_event, sweep_queue
+            )
+        finally:
+            for _ in workers:
+                sweep_queue.put(None)
+
+    def _process_sweeper_messages(
+        self, received_messages: Iterator[MessageList], stop_event: Event, sweep_queue: Queue
+    ):
+        """
+        Process the received sweeper messages until the sweeper is stopped.
+
+        Args:
+            received_messages (iterator): The batches of messages received from the sweeper queue.
+            stop_event (Event): The stop event of this run.
+            sweep_queue (Queue): The buffer to hand the queue URLs to the workers.
+        """
+        for messages in received_messages:
+            if stop_event.is_set():
+                break
+            if not messages:
+                continue
+            queue_urls = []
             for message in messages:
+                if message.body != TRIGGER_MESSAGE_BODY:
+                    queue_urls.append(message.body)
+                    continue
                 try:
-                    if message.body == TRIGGER_MESSAGE_BODY:
-                        self._publish_queues()
-                    else:
-                        self._sweep_idle_queue(message.body)
+                    self._publish_queues()
                 except Exception as e:
                     self._logger.exception(e)
-            messages.delete()
+            if not queue_urls:
+                messages.delete()
+                continue
+            batch = _SweepBatch(messages, len(queue_urls))
+            for queue_url in queue_urls:
+                sweep_queue.put((queue_url, batch))
 
     def _publish_queues(self):
-        """Publish the list of queues to check for idleness."""
+        """
+        Publish the list of queues to check for idleness.
+
+        Queue URLs are buffered and published ten at a time.
+        """
         self._logger.info("Publishing Queues in order to check for idleness.")
-        next_token = None
-        while True:
-            response = self._list_queues(next_token)
-            for queue_url in response["QueueUrls"]:
-                self._publish_queue(queue_url)
+        # Queues deleted elsewhere are never checked again, so their expired entries are dropped here.
+        now = timestamp()
+        self._active_until = {
+            queue_url: active_until
+            for queue_url, active_until in list(self._active_until.items())
+            if active_until > now
+        }
+        buffer = []
+        for queue_url in self._get_queue_urls():
+            if queue_url == self._queue_url:
+                continue
+            buffer.append(queue_url)
+            if len(buffer) == MAX_BATCH_SIZE:
+                self._publish_queue_batch(buffer)
+                buffer = []
+        if buffer:
+            self._publish_queue_batch(buffer)
+
+    def _get_queue_urls(self) -> Iterator[str]:
+        """
+        Yield the URLs of the queues to check for idleness.
 
-            next_token = response.get("NextToken")
-            if not next_token:
-                break
+        The last listing is reused for half the idle queue retention period. Otherwise the queues
+        are listed again, fetching the next page in the background while the current one is consumed.
 
-    def _publish_queue(self, queue_url: str):
+        Yields:
+            str: The URL of a queue.
+        """
+        if self._cached_queues:
+            listed_at, cached_queue_urls = self._cached_queues
+            if timestamp() - listed_at < self._idle_queue_retention_period // 2:
+                yield from cached_queue_urls
+                return
+
+        listed_at = timestamp()
+        listed_queue_urls = []
+        pages = self._list_queues()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(next, pages, None)
+            while True:
+                queue_urls = next_page.result()
+                if queue_urls is None:
+                    break
+                next_page = executor.submit(next, pages, None)
+                listed_queue_urls.extend(queue_urls)
+                yield from queue_urls
+        self._cached_queues = (listed_at, listed_queue_urls)
+
+    def _publish_queue_batch(self, queue_urls: List[str]):
         """
-        Publish a single queue URL to the sweeper queue.
+        Publish up to ten queue URLs to the sweeper queue with a single batch send.
+
+        The URLs that fail to be sent, e.g. because of throttling, are sent again once and logged if
+        they fail again, so that they are not silently left out of the sweep.
 
         Args:
-            queue_url (str): The URL of the queue to publish.
+            queue_urls (list): The URLs of the queues to publish.
         """
-        if queue_url == self._queue_url:
+        failed = self._send_queue_urls(queue_urls)
+        if not failed:
             return
-        message = self._request_message_class(
-            body=queue_url, queue_url=self._queue_url, group_id=queue_url
-        )
-        self._publisher.send_message(message)
+        queue_urls = [queue_urls[int(entry["Id"])] for entry in failed]
+        for entry in self._send_queue_urls(queue_urls):
+            self._logger.error(
+                "Queue %s could not be published for sweeping: %s",
+                queue_urls[int(entry["Id"])],
+                entry.get("Message", entry["Code"]),
+            )
+
+    def _send_queue_urls(self, queue_urls: List[str]) -> list:
+        """
+        Send queue URLs to the sweeper queue.
+
+        Args:
+            queue_urls (list): The URLs of the queues to send.
+
+        Returns:
+            list: The Failed entries, whose Id is the index of the URL.
+        """
+        messages = [
+            self._request_message_class(body=queue_url, queue_url=self._queue_url, group_id=queue_url)
+            for queue_url in queue_urls
+        ]
+        return self._publisher.send_messages(messages)["Failed"]
+
+    def _sweep_worker(self, sweep_queue: Queue):
+        """
+        Sweep the queues handed over by the sweeper thread until a None is received.
+
+        The messages of a batch are deleted by the worker that sweeps its last queue.
+
+        Args:
+            sweep_queue (Queue): The buffer of the run the worker belongs to.
+        """
+        while True:
+            item = sweep_queue.get()
+            if item is None:
+                break
+            queue_url, batch = item
+            try:
+                self._sweep_idle_queue(queue_url)
+            except Exception as e:
+                self._logger.exception(e)
+            try:
+                batch.done()
+            except Exception as e:
+                self._logger.exception(e)
 
     def _sweep_idle_queue(self, queue_url: str):
         """
@@ -234,30 +425,54 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
         Args:
             queue_url (str): The URL of the queue to sweep.
         """
-        self._logger.info("Checking for idleness: " + queue_url)
-        if self._is_queue_idle(queue_url):
-            self._logger.info("Deleting idle queue: " + queue_url)
+        self._logger.info("Checking for idleness: %s", queue_url)
+        if self._should_delete(queue_url):
+            self._logger.info("Deleting idle queue: %s", queue_url)
             self._connection.client.delete_queue(QueueUrl=queue_url)
+            self._active_until.pop(queue_url, None)
+            self._cached_queues = None
 
-    def _list_queues(self, next_token: str ="") -> List[dict]:
+    def _list_queues(self) -> Iterator[List[str]]:
         """
         List the queues with a specific prefix.
 
+        Yields:
+            list: The queue URLs of each page of results.
+        """
+        paginator = self._connection.client.get_paginator("list_queues")
+        for page in paginator.paginate(**self._list_queues_params):
+            yield page.get("QueueUrls", [])
+
+    def _should_delete(self, queue_url: str) -> bool:
+        """
+        Check if a queue is both empty and idle.
+
+        A queue whose last heartbeat was seen recently cannot become idle before
+        the retention period has elapsed, so it is not checked again until then.
+        Otherwise the queue attributes are fetched first and the heartbeat tag is
+        only looked up for empty queues.
+
         Args:
-            next_token (str, optional): The token for pagination. Defaults to "".
+            queue_url (str): The URL of the queue to check.
 
         Returns:
-            dict: The response containing the list of queue URLs and the next token for pagination.
+            bool: True if the queue should be deleted, False otherwise.
         """
-        params = {
-            "QueueNamePrefix": self._name,
-            "MaxResults": self._list_queues_max_results,
-        }
-        if next_token:
-            params["NextToken"] = next_token
-        return self._connection.client.list_queues(**params)
+        active_until = self._active_until.get(queue_url)
+        if active_until is not None:
+            if active_until > timestamp():
+                return False
+            # Expired: the queue is checked again, and only kept if it is still active.
+            self._active_until.pop(queue_url, None)
+        try:
+            return self._is_queue_empty(queue_url) and self._is_queue_idle(queue_url)
+        except Exception as e:
+            if e.__class__.__name__ != "QueueDoesNotExist":
+                raise e
+            self._active_until.pop(queue_url, None)
+            return False
 
-    def _is_queue_idle(self, queue_url) -> bool:
+    def _is_queue_idle(self, queue_url: str) -> bool:
         """
         Check if a queue is idle.
 
@@ -269,14 +484,13 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
         """
         tags = self._connection.client.list_queue_tags(QueueUrl=queue_url)["Tags"]
 
-        last_heartbeat = datetime.fromtimestamp(int(tags["heartbeat"]))
-        now = datetime.fromtimestamp(timestamp())
-        elapsed_time = (now - last_heartbeat).total_seconds()
-        return elapsed_time > self._idle_queue_retention_period
+        last_heartbeat = int(tags["heartbeat"])
+        self._active_until[queue_url] = last_heartbeat + self._idle_queue_retention_period
+        return timestamp() - last_heartbeat > self._idle_queue_retention_period
 
-    def _is_queue_empty(self, queue_url) -> bool:
+    def _is_queue_empty(self, queue_url: str) -> bool:
         """
-        Check if a queue is empty.
+        Check if a queue is empty, counting in-flight messages.
 
         Args:
             queue_url (str): The URL of the queue to check.
@@ -285,6 +499,7 @@ class IdleQueueSweeper(IdleQueueSweeperBase):
             bool: True if the queue is empty, False otherwise.
         """
         response = self._connection.client.get_queue_attributes(
-            QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+            QueueUrl=queue_url,
+            AttributeNames=["ApproximateNumberOfMessages", "ApproximateNumberOfMessagesNotVisible"],
         )
-        return not int(response["Attributes"]["ApproximateNumberOfMessages"])
+        return not any(int(count) for count in response["Attributes"].values())
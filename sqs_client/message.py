@@ -1,5 +1,10 @@
-import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from sys import intern
+from itertools import islice
 from time import time
+from uuid import uuid4
 
 from sqs_client.contracts import (
     Message as MessageBase,
@@ -8,6 +13,10 @@ from sqs_client.contracts import (
     RequestMessage as RequestMessageBase
 )
 
+# Bodies up to this length are interned, so that constant bodies such as
+# control messages compare by identity.
+INTERN_MAX_BODY_LENGTH = 32
+
 
 class RequestMessage(RequestMessageBase):
     def __init__(
@@ -17,21 +26,44 @@ class RequestMessage(RequestMessageBase):
         group_id: str = None,
         delay_seconds: int = 0,
         reply_queue: ReplyQueue = None,
-        message_attributes: dict = {},
+        message_attributes: dict = None,
+    ):
+        self.reset(body, queue_url, group_id, delay_seconds, reply_queue, message_attributes)
+
+    def reset(
+        self,
+        body: str,
+        queue_url: str,
+        group_id: str = None,
+        delay_seconds: int = 0,
+        reply_queue: ReplyQueue = None,
+        message_attributes: dict = None,
     ):
-        self._request_id = str(random.getrandbits(128))
+        """
+        Reinitializes the message, with a new request id, so the instance can be sent again.
+        Only safe once the previous send has completed.
+        """
+        self._request_id = uuid4().hex
         self._body = body
         self._group_id = group_id
         self._delay_seconds = delay_seconds
-        self._message_attributes = message_attributes
+        self._message_attributes = {} if message_attributes is None else dict(message_attributes)
         self.queue_url = queue_url
         self._reply_queue = reply_queue
+        self._params = None
 
     def get_params(self) -> dict:
+        # Built lazily: the reply queue is only created when its URL is first needed.
+        # Built once: retries and batch sends reuse the same params.
+        if self._params is None:
+            self._params = self._build_params()
+        return self._params
+
+    def _build_params(self) -> dict:
         params = {
             "MessageBody": self._body,
             "DelaySeconds": self._delay_seconds,
-            "MessageAttributes": self._message_attributes,
+            "MessageAttributes": dict(self._message_attributes),
         }
         if self._group_id:
             params["MessageGroupId"] = self._group_id
@@ -56,82 +88,276 @@ class Message(MessageBase):
         self.initial_time = time()
         self._message = message
 
-    @property
+    # The underlying message is never modified, so each field is read once.
+    @cached_property
     def body(self) -> str:
-        return self._message["Body"]
+        body = self._message["Body"]
+        if len(body) <= INTERN_MAX_BODY_LENGTH:
+            return intern(body)
+        return body
 
-    @property
+    @cached_property
     def id(self) -> str:
         return self._message["MessageId"]
 
-    @property
+    @cached_property
     def request_id(self) -> str:
         try:
             return self.attributes["RequestMessageId"]["StringValue"]
         except KeyError:
             return None
 
-    @property
+    @cached_property
     def reply_queue_url(self) -> str:
         try:
             return self.attributes["ReplyTo"]["StringValue"]
         except KeyError:
             return None
 
-    @property
+    @cached_property
     def attributes(self) -> dict:
         return self._message["MessageAttributes"]
 
 
-class MessageList(MessageListBase):
+def _chunks(entries):
+    # SQS only accepts up to ten messages per request
+    entries = iter(entries)
+    while True:
+        chunk = list(islice(entries, 10))
+        if not chunk:
+            break
+        yield chunk
+
+
+class _MessageListMixin:
+    """
+    The storage, iteration and chunking shared by the sync and async message lists.
+    The requests to SQS are left to the classes, so each one keeps a single calling convention.
+    """
+
     def __init__(self, client, queue, messages):
         self.client = client
         self.queue = queue
-        self.messages = messages
-        self.read_messages = []
+        # Both are keyed by MessageId, which deduplicates messages and makes
+        # removal O(1).
+        self.messages_map = {
+            message["MessageId"]: message for message in messages["Messages"]
+        }
+        self.read_messages = {}
 
     def __len__(self):
-        return len(self.messages["Messages"])
+        return len(self.messages_map)
 
     def __iter__(self):
         return self._fetch_one()
 
     def __add__(self, other_list):
-        self.messages["Messages"] += other_list.messages["Messages"]
+        """
+        Merges another list into this one, in place, and returns it.
+        Messages are keyed by id, so a message received twice is only deleted once.
+        """
+        self.messages_map.update(other_list.messages_map)
+        self.read_messages.update(other_list.read_messages)
         return self
 
     def _fetch_one(self):
-        messages_id = []
-        for message in self.messages["Messages"]:
-            if message["MessageId"] in messages_id:
-                continue
-            messages_id.append(message["MessageId"])
-            self.read_messages.append(
-                {"Id": message["MessageId"], "ReceiptHandle": message["ReceiptHandle"]}
-            )
+        # Iterate over a snapshot so messages can be removed while iterating.
+        for message in list(self.messages_map.values()):
+            self.read_messages[message["MessageId"]] = {
+                "Id": message["MessageId"],
+                "ReceiptHandle": message["ReceiptHandle"],
+            }
             yield Message(message)
 
     def remove(self, message_id):
         """
-        Removes a message from the object by id.
+        Removes a message from the object by id, in constant time.
         """
-        self.read_messages = list(
-            filter(lambda m: m["Id"] != message_id, self.read_messages)
+        self.read_messages.pop(message_id, None)
+        self.messages_map.pop(message_id, None)
+
+    def _visibility_chunks(self, visibility_timeout):
+        # Iterate over a snapshot, the list may be changed while its visibility is extended.
+        return _chunks(
+            {
+                "Id": message["MessageId"],
+                "ReceiptHandle": message["ReceiptHandle"],
+                "VisibilityTimeout": visibility_timeout,
+            }
+            for message in list(self.messages_map.values())
         )
-        self.messages["Messages"] = list(
-            filter(lambda m: m["MessageId"] != message_id, self.messages["Messages"])
+
+    def _delete_chunks(self, excluded_ids=()):
+        return _chunks(
+            entry
+            for message_id, entry in self.read_messages.items()
+            if message_id not in excluded_ids
         )
 
-    def delete(self):
+
+class MessageList(_MessageListMixin, MessageListBase):
+    # Shared by every list, so that large lists delete their chunks in parallel
+    # without creating threads on each call.
+    _delete_executor = ThreadPoolExecutor(max_workers=8)
+
+    def delete(self) -> list:
         """
         Deletes messages from the queue.
         It only deletes messages that were returned by the method _fetch_one
+        Returns the entries that SQS failed to delete.
+        """
+        return self.delete_except(())
+
+    def delete_except(self, message_ids) -> list:
+        """
+        Deletes messages from the queue, except the ones with the given ids.
+        It only deletes messages that were returned by the method _fetch_one
+        Returns the entries that SQS failed to delete.
         """
-        # SQS only accepts up to ten messages per request
-        for entries in self._delete_chunks():
-            self.client.delete_message_batch(QueueUrl=self.queue, Entries=entries)
+        chunks = list(self._delete_chunks(message_ids))
+        if len(chunks) == 1:
+            return self._delete_batch(chunks[0])
+        failed = []
+        for chunk_failed in self._delete_executor.map(self._delete_batch, chunks):
+            failed.extend(chunk_failed)
+        return failed
+
+    def change_visibility(self, visibility_timeout: int) -> list:
+        """
+        Makes every message of the list invisible for visibility_timeout seconds from now.
+        Returns the entries that SQS failed to change.
+        """
+        failed = []
+        for chunk in self._visibility_chunks(visibility_timeout):
+            response = self.client.change_message_visibility_batch(QueueUrl=self.queue, Entries=chunk)
+            failed.extend(response.get("Failed", []))
+        return failed
+
+    def _delete_batch(self, entries) -> list:
+        response = self.client.delete_message_batch(QueueUrl=self.queue, Entries=entries)
+        return response.get("Failed", [])
+
+
+class ChainedMessageList(MessageListBase):
+    """
+    A list over several lists received from the same queue, without copying their messages.
+    Each part keeps track of its read messages, and they are deleted together in chunks of ten.
+    """
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def __len__(self):
+        return len(set().union(*(part.messages_map for part in self.parts)))
 
-    def _delete_chunks(self):
-        n = 10
-        for i in range(0, len(self.read_messages), n):
-            yield self.read_messages[i : i + n]
+    def __iter__(self):
+        # A message may be received again before it is deleted. Only its latest delivery is
+        # yielded, since the receipt handles of the earlier ones no longer delete it.
+        latest_part = {}
+        for index, part in enumerate(self.parts):
+            for message_id in part.messages_map:
+                latest_part[message_id] = index
+        for index, part in enumerate(self.parts):
+            for message in part:
+                if latest_part.get(message.id) == index:
+                    yield message
+
+    def __add__(self, other_list):
+        """
+        Appends the parts of another list to this one, in place, and returns it.
+        """
+        if isinstance(other_list, ChainedMessageList):
+            self.parts.extend(other_list.parts)
+        else:
+            self.parts.append(other_list)
+        return self
+
+    def remove(self, message_id):
+        """
+        Removes a message from the object by id.
+        """
+        for part in self.parts:
+            part.remove(message_id)
+
+    def delete(self) -> list:
+        """
+        Deletes messages from the queue.
+        It only deletes messages that were read from the parts.
+        Returns the entries that SQS failed to delete.
+        """
+        return self.delete_except(())
+
+    def delete_except(self, message_ids) -> list:
+        """
+        Deletes messages from the queue, except the ones with the given ids.
+        It only deletes messages that were read from the parts.
+        Returns the entries that SQS failed to delete.
+        """
+        if not self.parts:
+            return []
+        # Entries are taken from every part, so chunks are full even when the parts are not.
+        # Later parts overwrite earlier ones, so a redelivered message is deleted with its
+        # latest receipt handle.
+        entries = {}
+        for part in self.parts:
+            for message_id, entry in part.read_messages.items():
+                if message_id not in message_ids:
+                    entries[message_id] = entry
+        chunks = list(_chunks(entries.values()))
+        failed = []
+        for chunk_failed in MessageList._delete_executor.map(self.parts[0]._delete_batch, chunks):
+            failed.extend(chunk_failed)
+        return failed
+
+    def change_visibility(self, visibility_timeout: int) -> list:
+        """
+        Makes every message of the list invisible for visibility_timeout seconds from now.
+        Returns the entries that SQS failed to change.
+        """
+        failed = []
+        for part in self.parts:
+            failed.extend(part.change_visibility(visibility_timeout))
+        return failed
+
+
+class AsyncMessageList(_MessageListMixin):
+    """
+    A list of messages received with an aiobotocore client, whose deletions are coroutines.
+    It is not a MessageList, since code written against that contract would not await them.
+    """
+
+    async def delete(self) -> list:
+        """
+        Deletes messages from the queue.
+        It only deletes messages that were returned by the method _fetch_one
+        Returns the entries that SQS failed to delete.
+        """
+        return await self.delete_except(())
+
+    async def delete_except(self, message_ids) -> list:
+        """
+        Deletes messages from the queue, except the ones with the given ids.
+        Every chunk of ten messages is deleted concurrently.
+        Returns the entries that SQS failed to delete.
+        """
+        responses = await asyncio.gather(
+            *(
+                self.client.delete_message_batch(QueueUrl=self.queue, Entries=chunk)
+                for chunk in self._delete_chunks(message_ids)
+            )
+        )
+        return [entry for response in responses for entry in response.get("Failed", [])]
+
+    async def change_visibility(self, visibility_timeout: int) -> list:
+        """
+        Makes every message of the list invisible for visibility_timeout seconds from now.
+        Every chunk of ten messages is changed concurrently.
+        Returns the entries that SQS failed to change.
+        """
+        responses = await asyncio.gather(
+            *(
+                self.client.change_message_visibility_batch(QueueUrl=self.queue, Entries=chunk)
+                for chunk in self._visibility_chunks(visibility_timeout)
+            )
+        )
+        return [entry for response in responses for entry in response.get("Failed", [])]
@@ -1,9 +1,19 @@
-from time import sleep
-
-from boto3.resources.base import ServiceResource
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from random import uniform
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Dict, List, Tuple
 
 from sqs_client.contracts import Publisher as PublisherBase
 from sqs_client.contracts import RequestMessage, SqsConnection
+from sqs_client.exceptions import MessageNotSent, OutboxWriteFailed
+
+# Maximum number of entries accepted by a single SendMessageBatch request.
+MAX_BATCH_SIZE = 10
+# Maximum total size of the bodies and attributes of a single SendMessageBatch request.
+MAX_BATCH_BYTES = 256 * 1024
 
 
 class Publisher(PublisherBase):
@@ -25,12 +35,6 @@ class Publisher(PublisherBase):
         self._connection = sqs_connection
         self._queue_url = queue_url
 
-        if queue_url:
-            self._set_queue(queue_url)
-            self._queue = self._get_queue()
-        else:
-            self._queue = None
-
     def send_message(self, request_message: RequestMessage) -> dict:
         """
         Send a message using the specified request message.
@@ -41,31 +45,126 @@ class Publisher(PublisherBase):
         Returns:
             dict: The response from the send_message API call.
         """
-        params = request_message.get_params()
+        return self._connection.client.send_message(
+            QueueUrl=self._get_queue_url(request_message),
+            **request_message.get_params()
+        )
+
+    def send_messages(self, request_messages: List[RequestMessage]) -> dict:
+        """
+        Send several messages using as few SendMessageBatch calls as possible.
+
+        Messages are grouped by destination queue and sent in chunks of up to ten entries and
+        256 KB of bodies and attributes. Each entry Id is the index of the message in `request_messages`, so the failed
+        messages can be retried with `request_messages[int(entry["Id"])]`.
+
+        Args:
+            request_messages (list): The messages to be sent.
+
+        Returns:
+            dict: The "Successful" and "Failed" entries of every send_message_batch call. The entries
+            of a call that raised are reported as failed.
+        """
+        result = {"Successful": [], "Failed": []}
+        for queue_url, messages in self._group_by_queue(request_messages).items():
+            for entries in self._chunk_entries(messages):
+                try:
+                    response = self._connection.client.send_message_batch(
+                        QueueUrl=queue_url, Entries=entries
+                    )
+                except Exception as e:
+                    # Only the entries of the rejected request fail, not the whole call.
+                    result["Failed"].extend(
+                        {
+                            "Id": entry["Id"],
+                            "SenderFault": False,
+                            "Code": e.__class__.__name__,
+                            "Message": str(e),
+                        }
+                        for entry in entries
+                    )
+                    continue
+                result["Successful"].extend(response.get("Successful", []))
+                result["Failed"].extend(response.get("Failed", []))
+        return result
+
+    def _chunk_entries(self, messages: List[Tuple[int, RequestMessage]]):
+        """
+        Split the messages of a queue into SendMessageBatch entries within the count and size limits.
+
+        A message larger than the size limit on its own is sent alone, for SQS to report it as failed.
 
-        if self._queue:
-            return self._queue.send_message(**params)
-        else:
-            self._set_queue(request_message.queue_url)
-            return self._get_queue().send_message(**params)
+        Args:
+            messages (list): The (index, message) pairs for a queue.
 
-    def _get_queue(self) -> ServiceResource:
+        Yields:
+            list: The entries of a SendMessageBatch request.
         """
-        Retrieve the queue resource associated with the current queue URL.
+        entries = []
+        size = 0
+        for index, request_message in messages:
+            params = request_message.get_params()
+            message_size = _get_message_size(params)
+            if entries and (
+                len(entries) == MAX_BATCH_SIZE or size + message_size > MAX_BATCH_BYTES
+            ):
+                yield entries
+                entries = []
+                size = 0
+            entries.append({"Id": str(index), **params})
+            size += message_size
+        if entries:
+            yield entries
+
+    def _group_by_queue(
+        self, request_messages: List[RequestMessage]
+    ) -> Dict[str, List[Tuple[int, RequestMessage]]]:
+        """
+        Group messages by the URL of the queue they should be sent to.
+
+        Args:
+            request_messages (list): The messages to be grouped.
 
         Returns:
-            boto3.resources.base.ServiceResource: The SQS queue resource.
+            dict: The (index, message) pairs for each queue URL.
         """
-        return self._connection.get_queue_resource()
+        groups = {}
+        for index, request_message in enumerate(request_messages):
+            queue_url = self._get_queue_url(request_message)
+            groups.setdefault(queue_url, []).append((index, request_message))
+        return groups
 
-    def _set_queue(self, queue_url):
+    def _get_queue_url(self, request_message: RequestMessage) -> str:
         """
-        Set the queue URL for the current instance.
+        Resolve the URL of the queue a message should be sent to.
 
         Args:
-            queue_url (str): The URL of the queue to be set.
+            request_message (RequestMessage): The message to be sent.
+
+        Returns:
+            str: The publisher's queue URL, or the message's own queue URL if none was set.
         """
-        self._connection.set_queue(queue_url)
+        return self._queue_url or request_message.queue_url
+
+
+def _get_message_size(params: dict) -> int:
+    """
+    Compute the size SQS counts for a message: its body and the names, types and values of its attributes.
+
+    Args:
+        params (dict): The params of the message.
+
+    Returns:
+        int: The size in bytes.
+    """
+    size = len(params["MessageBody"].encode())
+    for name, attribute in params.get("MessageAttributes", {}).items():
+        size += len(name.encode()) + len(attribute["DataType"].encode())
+        if "StringValue" in attribute:
+            size += len(attribute["StringValue"].encode())
+        if "BinaryValue" in attribute:
+            size += len(attribute["BinaryValue"])
+    return size
 
 
 class RetryPublisher(PublisherBase):
@@ -75,9 +174,23 @@ class RetryPublisher(PublisherBase):
     The RetryPublisher class attempts to publish messages using a provided Publisher instance and retries
     the operation a certain number of times. If the operation fails, it can optionally fallback to an outbox
     repository to store the message for later processing.
+
+    Outbox writes run in the background, and their failures are only reported by `close`, which logs them
+    and raises OutboxWriteFailed. `close` is not part of the Publisher contract and the factories never
+    call it, so call it before exiting, or failed outbox writes go unnoticed.
     """
     def __init__(
-        self, publisher: Publisher, retries: int=3, outbox_repository=None, queue_url: str=None
+        self,
+        publisher: Publisher,
+        retries: int=3,
+        outbox_repository=None,
+        queue_url: str=None,
+        inner_retries: int=3,
+        backoff_base: float=0.1,
+        backoff_cap: float=8.0,
+        max_backoff_seconds: float=30.0,
+        outbox_max_workers: int=4,
+        outbox_max_pending: int=1000,
     ):
         """
         Initialize a RetryPublisher instance.
@@ -87,11 +200,32 @@ class RetryPublisher(PublisherBase):
             retries (int, optional): The number of retries for message publishing. Defaults to 3.
             outbox_repository (Any, optional): An outbox repository to store messages. Defaults to None.
             queue_url (str, optional): The URL of the queue to which messages will be sent. Defaults to None.
+            inner_retries (int, optional): The number of publishing attempts per retry. Defaults to 3.
+            backoff_base (float, optional): The base of the exponential backoff, in seconds. Defaults to 0.1.
+            backoff_cap (float, optional): The maximum backoff between two attempts, in seconds. Defaults to 8.0.
+            max_backoff_seconds (float, optional): The maximum time spent in backoff per retry. Defaults to 30.0.
+            outbox_max_workers (int, optional): The number of threads writing to the outbox. Defaults to 4.
+            outbox_max_pending (int, optional): The maximum number of outbox writes in progress. Defaults to 1000.
         """
         self._queue_url = queue_url
         self._publisher = publisher
         self._outbox_repository = outbox_repository
         self._retries = retries
+        self._inner_retries = inner_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._max_backoff_seconds = max_backoff_seconds
+        self._logger = logging.getLogger()
+        self._outbox_executor = None
+        if outbox_repository:
+            self._outbox_executor = ThreadPoolExecutor(
+                max_workers=outbox_max_workers, thread_name_prefix="outbox"
+            )
+        self._outbox_max_pending = outbox_max_pending
+        self._outbox_pending = 0
+        self._outbox_lock = Lock()
+        # Failed outbox writes, reported by close.
+        self._outbox_errors = []
 
     def send_message(self, request_message: RequestMessage):
         """
@@ -103,16 +237,18 @@ class RetryPublisher(PublisherBase):
         Raises:
             Exception: If the message cannot be successfully sent after all retries and fallback attempts.
         """
-        for _ in range(0, self._retries):
+        last_exception = None
+        for attempt in range(self._retries):
             try:
-                self._publish(request_message)
+                return self._publish(request_message)
             except Exception as e:
+                last_exception = e
                 if self._publish_via_outbox(request_message):
                     return
-            finally:
-                return
+            if attempt < self._retries - 1:
+                sleep(self._backoff(attempt))
         # TODO: Add specific exception
-        raise Exception("Message could not be sent")
+        raise Exception("Message could not be sent") from last_exception
 
     def _publish(self, request_message: RequestMessage):
         """
@@ -124,34 +260,298 @@ class RetryPublisher(PublisherBase):
         Raises:
             Exception: If the message cannot be published after all retries.
         """
-        success = False
-        for _ in range(3):
+        deadline = monotonic() + self._max_backoff_seconds
+        last_exception = None
+        for attempt in range(self._inner_retries):
             try:
                 self._publisher.send_message(request_message)
+                return
             except Exception as e:
-                print("Error while trying to publish event.. trying again..")
-                sleep(0.25)
-            else:
-                success = True
-                break
-        if not success:
-            # TODO: Add specific exception
-            raise Exception("Event not published in queue.")
+                last_exception = e
+                if attempt == self._inner_retries - 1:
+                    break
+                delay = self._backoff(attempt)
+                if monotonic() + delay > deadline:
+                    break
+                self._logger.warning("Error while trying to publish event.. trying again..")
+                sleep(delay)
+        # TODO: Add specific exception
+        raise Exception("Event not published in queue.") from last_exception
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Compute the delay before the next attempt, using exponential backoff with full jitter.
+
+        Args:
+            attempt (int): The number of the attempt that just failed, starting at 0.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return uniform(0, min(self._backoff_cap, self._backoff_base * 2 ** attempt))
 
     def _publish_via_outbox(self, request_message: RequestMessage) -> bool:
         """
         Publish a message via the outbox repository as a fallback mechanism.
 
+        The write is handed to the outbox workers so that the caller does not wait for it.
+        If too many writes are already in progress, the message is not accepted.
+
         Args:
             request_message (RequestMessage): The message to be sent.
 
         Returns:
-            bool: True if the message was successfully published via the outbox, False otherwise.
+            bool: True if the message was handed to the outbox, False otherwise.
         """
         if not self._outbox_repository:
             return False
+        with self._outbox_lock:
+            if self._outbox_pending >= self._outbox_max_pending:
+                return False
+            self._outbox_pending += 1
         try:
-            self._outbox_repository.create(request_message)
-        except Exception as e:
+            future = self._outbox_executor.submit(self._outbox_repository.create, request_message)
+        except Exception:
+            with self._outbox_lock:
+                self._outbox_pending -= 1
             return False
+        future.add_done_callback(self._outbox_write_done)
         return True
+
+    def _outbox_write_done(self, future: Future):
+        """
+        Release the slot of a finished outbox write, and record its error if it failed.
+
+        Args:
+            future (Future): The finished write.
+        """
+        error = future.exception()
+        with self._outbox_lock:
+            self._outbox_pending -= 1
+            if error is not None:
+                self._outbox_errors.append(error)
+
+    def close(self):
+        """
+        Wait for the pending outbox writes and stop the outbox workers.
+
+        Raises:
+            OutboxWriteFailed: If any of the outbox writes failed.
+        """
+        if not self._outbox_executor:
+            return
+        self._outbox_executor.shutdown(wait=True)
+        with self._outbox_lock:
+            errors = self._outbox_errors
+            self._outbox_errors = []
+        for error in errors:
+            self._logger.error(error, exc_info=error)
+        if errors:
+            raise OutboxWriteFailed(
+                f"{len(errors)} messages could not be written to the outbox"
+            ) from errors[0]
+
+
+class BufferedPublisher(PublisherBase):
+    """
+    A publisher that buffers messages and sends them with SendMessageBatch.
+
+    Callers still send one message at a time, but messages are buffered per queue and sent by a
+    background thread once `max_batch_size` messages are buffered or `max_batch_open_ms` have passed
+    since the first message of the batch was buffered, whichever comes first.
+
+    The sending threads are daemons, so call `flush()` to wait for the buffered messages, or
+    `close()` before exiting; messages still buffered when the interpreter exits are lost.
+    """
+    def __init__(
+        self,
+        publisher: Publisher,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_batch_open_ms: int = 200,
+        queue_url: str = None,
+    ):
+        """
+        Initialize a BufferedPublisher instance.
+
+        Args:
+            publisher (Publisher): The Publisher used to send each batch.
+            max_batch_size (int, optional): The maximum number of messages per batch, up to 10. Defaults to 10.
+            max_batch_open_ms (int, optional): How long a batch waits for more messages, in milliseconds. Defaults to 200.
+            queue_url (str, optional): The URL of the queue to which messages will be sent. Defaults to None.
+        """
+        self._publisher = publisher
+        self._max_batch_size = min(max_batch_size, MAX_BATCH_SIZE)
+        self._max_batch_open_seconds = max_batch_open_ms / 1000
+        self._queue_url = queue_url
+        self._buffers = {}
+        self._threads = []
+        self._buffers_lock = Lock()
+        self._closed = False
+        self._logger = logging.getLogger()
+
+    def send_message(self, request_message: RequestMessage) -> Future:
+        """
+        Buffer a message to be sent in the next batch for its queue.
+
+        Args:
+            request_message (RequestMessage): The message to be sent.
+
+        Returns:
+            Future: Resolves to the Successful entry of the message, or fails with MessageNotSent.
+
+        Raises:
+            RuntimeError: If the publisher is closed.
+        """
+        future = Future()
+        queue_url = self._queue_url or request_message.queue_url
+        self._buffer(queue_url, request_message, future)
+        return future
+
+    def send_messages(self, request_messages: List[RequestMessage]) -> dict:
+        """
+        Buffer several messages and wait until they have been sent.
+
+        Args:
+            request_messages (list): The messages to be sent.
+
+        Returns:
+            dict: The "Successful" and "Failed" entries, whose Id is the index of the message.
+        """
+        futures = [self.send_message(request_message) for request_message in request_messages]
+        result = {"Successful": [], "Failed": []}
+        for index, future in enumerate(futures):
+            try:
+                entry = future.result()
+            except Exception as e:
+                result["Failed"].append(
+                    {"Id": str(index), "SenderFault": True, "Code": e.__class__.__name__, "Message": str(e)}
+                )
+            else:
+                result["Successful"].append({**entry, "Id": str(index)})
+        return result
+
+    def flush(self):
+        """
+        Wait until every message buffered so far has been sent or has failed.
+        """
+        with self._buffers_lock:
+            buffers = list(self._buffers.values())
+        for buffer in buffers:
+            buffer.join()
+
+    def close(self):
+        """
+        Send the buffered messages and stop the sending threads.
+
+        Messages cannot be sent after the publisher is closed.
+        """
+        with self._buffers_lock:
+            if self._closed:
+                return
+            self._closed = True
+            buffers = list(self._buffers.values())
+            threads = list(self._threads)
+        for buffer in buffers:
+            buffer.put(None)
+        for thread in threads:
+            thread.join()
+
+    def _buffer(self, queue_url: str, request_message: RequestMessage, future: Future):
+        """
+        Buffer a message for a queue, starting the sending thread of the queue on first use.
+
+        The message is buffered under the lock so that it cannot land after the None item put by `close()`.
+
+        Args:
+            queue_url (str): The URL of the queue.
+            request_message (RequestMessage): The message to be sent.
+            future (Future): The future of the message.
+
+        Raises:
+            RuntimeError: If the publisher is closed.
+        """
+        with self._buffers_lock:
+            if self._closed:
+                raise RuntimeError("cannot send messages after the publisher is closed")
+            buffer = self._buffers.get(queue_url)
+            if buffer is None:
+                buffer = self._buffers[queue_url] = Queue()
+                thread = Thread(target=self._send_buffered, args=(buffer,), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            buffer.put((request_message, future))
+
+    def _send_buffered(self, buffer: Queue):
+        """
+        Send the messages of a buffer in batches until a None item is buffered.
+
+        A batch is opened by its first message and then kept open for the whole window unless it
+        fills up, so that messages arriving concurrently share a batch. Messages whose future was
+        cancelled are dropped. Every item taken is marked done once its batch is sent, so that
+        `flush()` can join the buffer.
+
+        Args:
+            buffer (Queue): The buffered (message, future) pairs for a queue.
+        """
+        while True:
+            item = buffer.get()
+            if item is None:
+                buffer.task_done()
+                return
+            request_message, future = item
+            if not future.set_running_or_notify_cancel():
+                buffer.task_done()
+                continue
+            batch = [(request_message, future)]
+            taken = 1
+            closing = False
+            deadline = monotonic() + self._max_batch_open_seconds
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = buffer.get(timeout=remaining)
+                except Empty:
+                    break
+                taken += 1
+                if item is None:
+                    closing = True
+                    break
+                request_message, future = item
+                if future.set_running_or_notify_cancel():
+                    batch.append((request_message, future))
+            # A bad batch must not stop the thread, or the later messages of the queue are never sent.
+            try:
+                self._send_batch(batch)
+            except Exception as e:
+                self._logger.exception(e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in range(taken):
+                    buffer.task_done()
+            if closing:
+                return
+
+    def _send_batch(self, batch: List[Tuple[RequestMessage, Future]]):
+        """
+        Send a batch of messages and resolve their futures.
+
+        Args:
+            batch (list): The (message, future) pairs to send.
+        """
+        try:
+            result = self._publisher.send_messages([message for message, _ in batch])
+        except Exception as e:
+            self._logger.exception(e)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for entry in result["Successful"]:
+            batch[int(entry["Id"])][1].set_result(entry)
+        for entry in result["Failed"]:
+            batch[int(entry["Id"])][1].set_exception(
+                MessageNotSent(entry.get("Message", entry["Code"]))
+            )
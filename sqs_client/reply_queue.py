@@ -1,17 +1,131 @@
+import asyncio
 import logging
-from uuid import uuid4
-from multiprocessing import Process
-from threading import Thread
-from time import sleep, time
+import secrets
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from threading import Event, Lock, Thread
+from time import time
+from typing import Iterable, List
 
-from multiprocessing_logging import install_mp_handler, uninstall_mp_handler
-
-from sqs_client.contracts import IdleQueueSweeper, Message
+from sqs_client.contracts import IdleQueueSweeper, Message, MessageList
 from sqs_client.contracts import ReplyQueue as ReplyQueueBase
 from sqs_client.contracts import SqsConnection, Subscriber
 from sqs_client.exceptions import ReplyTimeout
+from sqs_client.message import Message as ResponseMessage
 from sqs_client.utils import str_timestamp
 
+_event_loop = None
+_event_loop_lock = Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop shared by every AsyncReplyQueue, starting it on first use.
+
+    The loop runs forever in a daemon thread, on uvloop when it is installed.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            try:
+                import uvloop
+
+                loop = uvloop.new_event_loop()
+            except ImportError:
+                loop = asyncio.new_event_loop()
+            Thread(target=loop.run_forever, daemon=True).start()
+            _event_loop = loop
+    return _event_loop
+
+
+class _HeartbeatManager:
+    """
+    Send the heartbeats of every reply queue in the process from a single thread.
+
+    Each registered queue is tagged once per its heartbeat interval. The thread sleeps until
+    the next heartbeat is due, so any number of reply queues costs one thread.
+    """
+    _instance = None
+    _instance_lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "_HeartbeatManager":
+        """
+        Return the heartbeat manager of the process, creating it on first use.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        # queue URL -> (client, interval in seconds, time of the next heartbeat)
+        self._queues = {}
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._thread = None
+        self._logger = logging.getLogger()
+
+    def register(self, queue_url: str, client, interval_seconds: int):
+        """
+        Start sending heartbeats to a queue, the first one after a full interval.
+
+        Args:
+            queue_url (str): The URL of the queue.
+            client: The SQS client used to tag the queue.
+            interval_seconds (int): The interval between heartbeats in seconds.
+        """
+        with self._lock:
+            self._queues[queue_url] = (client, interval_seconds, time() + interval_seconds)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def unregister(self, queue_url: str):
+        """
+        Stop sending heartbeats to a queue.
+
+        Args:
+            queue_url (str): The URL of the queue.
+        """
+        with self._lock:
+            self._queues.pop(queue_url, None)
+
+    def _run(self):
+        """
+        Send the heartbeats that are due, forever.
+        """
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                next_heartbeat = min(
+                    (heartbeat_at for _, _, heartbeat_at in self._queues.values()),
+                    default=None,
+                )
+            timeout = None if next_heartbeat is None else max(0, next_heartbeat - time())
+            self._wakeup.wait(timeout)
+            self._send_due_heartbeats()
+
+    def _send_due_heartbeats(self):
+        """
+        Tag every queue whose heartbeat is due and schedule its next heartbeat.
+        """
+        now = time()
+        due = []
+        with self._lock:
+            for queue_url, (client, interval_seconds, heartbeat_at) in self._queues.items():
+                if heartbeat_at <= now:
+                    due.append((queue_url, client))
+                    self._queues[queue_url] = (client, interval_seconds, now + interval_seconds)
+        for queue_url, client in due:
+            self._logger.info("Reply Queue Heartbeat: %s", queue_url)
+            try:
+                client.tag_queue(QueueUrl=queue_url, Tags={"heartbeat": str_timestamp()})
+            except Exception as e:
+                self._logger.exception(e)
+
 
 class ReplyQueue(ReplyQueueBase):
     """
@@ -30,9 +144,10 @@ class ReplyQueue(ReplyQueueBase):
         seconds_before_cleaning: int = 20,
         num_messages_before_cleaning: int = 200,
         heartbeat_interval_seconds=300,
+        response_cache=None,
     ):
-        self._id = str(uuid4())
-        self._queue = None
+        self._id = secrets.token_hex(16)
+        self._queue_url = None
         self._name = name
         self._connection = sqs_connection
         self._subscriber = subscriber
@@ -41,9 +156,20 @@ class ReplyQueue(ReplyQueueBase):
         self._num_messages_before_cleaning = num_messages_before_cleaning
         self._heartbeat_interval_seconds = heartbeat_interval_seconds
         self._idle_queue_sweeper = idle_queue_sweeper
+        # Optional persistent store for responses, e.g. a diskcache.Cache.
+        self._response_cache = response_cache
         self._sub_thread = None
+        self._delete_executor = None
         self._cleaner_thread = None
         self._messages = {}
+        # One event per caller waiting for a response, so that storing a response
+        # only wakes up the caller waiting for it.
+        self._waiters = {}
+        # (expiry time, request id) pairs in insertion order, hence in expiry order.
+        self._expiry_order = deque()
+        # Guards _messages, _waiters and _expiry_order, which are shared by the callers and
+        # the receiving thread. Callers never wait for a response while holding it.
+        self._messages_lock = Lock()
         self._logger = logging.getLogger()
 
     def get_url(self) -> str:
@@ -54,9 +180,9 @@ class ReplyQueue(ReplyQueueBase):
         Returns:
             str: The queue URL.
         """
-        if not self._queue:
+        if not self._queue_url:
             self._create_queue()
-        return self._queue.url
+        return self._queue_url
 
     def get_name(self) -> str:
         """
@@ -70,6 +196,10 @@ class ReplyQueue(ReplyQueueBase):
     def get_response_by_id(self, message_id: str, timeout: int = 5) -> Message:
         """
         Retrieve a response message by its ID.
+
+        Blocks until the response arrives or the timeout expires. The response is
+        removed from memory once it is returned. If a response cache is configured,
+        a response found there is returned immediately, and stays in the cache until it expires.
         
         Args:
             message_id (str): The ID of the response message.
@@ -81,14 +211,24 @@ class ReplyQueue(ReplyQueueBase):
         Raises:
             ReplyTimeout: If the response retrieval times out.
         """
-        start = time()
-        while True:
-            message = self._messages.get(message_id)
-            if not message:
-                if (time() - start) > timeout:
-                    raise ReplyTimeout
-                continue
-            return message
+        if self._response_cache is not None:
+            message = self._response_cache.get(message_id)
+            if message is not None:
+                with self._messages_lock:
+                    self._messages.pop(message_id, None)
+                return message
+        with self._messages_lock:
+            message = self._messages.pop(message_id, None)
+            if message is not None:
+                return message
+            waiter = self._waiters.setdefault(message_id, Event())
+        waiter.wait(timeout)
+        with self._messages_lock:
+            self._waiters.pop(message_id, None)
+            message = self._messages.pop(message_id, None)
+        if message is None:
+            raise ReplyTimeout
+        return message
 
     def _create_queue(self):
         """
@@ -97,13 +237,15 @@ class ReplyQueue(ReplyQueueBase):
         This method creates a new queue using the SQS connection, sets its attributes such as
         message retention period, and starts necessary threads for managing the queue.
         """
-        self._queue = self._connection.resource.create_queue(
+        self._queue_url = self._connection.client.create_queue(
             QueueName=self.get_name(),
-            Attributes={"MessageRetentionPeriod": str(self._message_retention_period)},
+            Attributes={
+                "MessageRetentionPeriod": str(self._message_retention_period),
+                "ReceiveMessageWaitTimeSeconds": "20",  # long polling
+            },
             tags={"heartbeat": str_timestamp()},
-        )
-        self._logger.info(self._queue.url)
-        install_mp_handler(self._logger)
+        )["QueueUrl"]
+        self._logger.info(self._queue_url)
         self._start_heartbeat()
         self._start_idle_queue_sweeper()
         self._start_sub_thread()
@@ -121,64 +263,57 @@ class ReplyQueue(ReplyQueueBase):
         """
         Remove the queue and associated components.
 
-        This method stops the heartbeat, idle queue sweeper, deletes the queue using the SQS connection,
-        and uninstalls the multiprocess handler from the logger.
+        This method stops the heartbeat, idle queue sweeper and deletes the queue using the SQS connection.
         """
-        if self._queue:
+        if self._queue_url:
+            queue_url = self._queue_url
             self._stop_heartbeat()
             self._idle_queue_sweeper.stop()
-            self._connection.client.delete_queue(QueueUrl=self._queue.url)
-            self._queue = None
-            uninstall_mp_handler(self._logger)
+            # Cleared before the workers stop, so that the receiving loop stops too and
+            # the errors of its last receive call, once the queue is deleted, are expected.
+            self._queue_url = None
+            self._stop_sub_thread()
+            self._connection.client.delete_queue(QueueUrl=queue_url)
 
     def _start_sub_thread(self):
         """
         Start the subscription thread for receiving messages.
 
-        This method creates and starts a new thread to handle message subscription and processing.
+        This method creates and starts a new thread to handle message subscription and processing,
+        along with a small pool of workers that delete the received messages from the queue.
         """
+        self._delete_executor = ThreadPoolExecutor(max_workers=4)
         self._sub_thread = Thread(target=self._subscribe)
         self._sub_thread.daemon = True
         self._sub_thread.start()
 
-    def _start_heartbeat(self):
-        """
-        Start the heartbeat process for queue health monitoring.
-
-        This method creates and starts a new process to handle sending periodic heartbeat messages.
-        """
-        self._heartbeat_process = Process(target=self._heartbeat)
-        self._heartbeat_process.daemon = True
-        self._heartbeat_process.start()
-
-    def _stop_heartbeat(self):
+    def _stop_sub_thread(self):
         """
-        Stop the heartbeat process.
+        Stop the workers that delete received messages.
 
-        This method terminates the heartbeat process and waits for its completion.
+        The subscription thread itself stops after its current receive call, as the queue URL is cleared.
         """
-        self._heartbeat_process.terminate()
-        self._heartbeat_process.join()
+        self._delete_executor.shutdown(wait=False)
 
-    def _heartbeat(self):
+    def _start_heartbeat(self):
         """
-        Periodically send heartbeat messages to the queue to monitor its health.
+        Start sending heartbeats to the queue for queue health monitoring.
 
-        This method sends heartbeat messages to the queue at regular intervals to indicate that the queue is active.
+        The heartbeats of every reply queue in the process are sent by a single shared thread.
+        The queue is created with a heartbeat tag, so the first one is sent after a full interval.
         """
         self._logger.info(
-            "heartbeat_interval_seconds " + str(self._heartbeat_interval_seconds)
+            "heartbeat_interval_seconds %s", self._heartbeat_interval_seconds
+        )
+        _HeartbeatManager.get_instance().register(
+            self._queue_url, self._connection.client, self._heartbeat_interval_seconds
         )
 
-        while True:
-            self._logger.info("Reply Queue Heartbeat")
-            try:
-                self._connection.client.tag_queue(
-                    QueueUrl=self._queue.url, Tags={"heartbeat": str_timestamp()}
-                )
-            except Exception as e:
-                self._logger.exception(e)
-            sleep(self._heartbeat_interval_seconds)
+    def _stop_heartbeat(self):
+        """
+        Stop sending heartbeats to the queue.
+        """
+        _HeartbeatManager.get_instance().unregister(self._queue_url)
 
     def _subscribe(self):
         """
@@ -191,7 +326,7 @@ class ReplyQueue(ReplyQueueBase):
         except Exception as e:
             # TODO: fix it..
             error = e.__class__.__name__
-            if error != "QueueDoesNotExist" and self._queue:
+            if error != "QueueDoesNotExist" and self._queue_url:
                 raise e
 
     def _receive_messages(self):
@@ -201,32 +336,205 @@ class ReplyQueue(ReplyQueueBase):
         This method sets up the subscriber to the queue and continuously receives messages from the queue,
         processing and storing them in the `_messages` dictionary.
         """
-        self._subscriber.set_queue(self._queue.url)
-        while True:
-            qty_messages = 0
-            for messages in self._subscriber.receive_messages(
-                message_attribute_names=["RequestMessageId"]
-            ):
-                qty_messages += len(messages)
-                for message in messages:
-                    self._messages[message.request_id] = message
-                messages.delete()
-                if qty_messages >= self._num_messages_before_cleaning:
+        self._subscriber.set_queue(self._queue_url)
+        qty_messages = 0
+        for messages in self._subscriber.receive_messages(
+            return_none=True,
+            message_attribute_names=["RequestMessageId"],
+            wait_time_seconds=20,
+            max_number_of_messages=10,
+        ):
+            if messages is None:
+                if self._queue_url is None:
                     break
-            self._clean_old_messages()
+                # Nothing was received: only responses that already expired are visited.
+                self._clean_old_messages()
+                continue
+            qty_messages += len(messages)
+            received = self._store_responses(messages)
+            if self._queue_url is None:
+                break
+            try:
+                self._delete_executor.submit(self._delete_messages, messages)
+                if self._response_cache is not None:
+                    self._delete_executor.submit(self._cache_responses, received)
+            except RuntimeError:
+                # The queue was removed after the check above, so its workers are shut down.
+                break
+            if qty_messages >= self._num_messages_before_cleaning:
+                self._clean_old_messages()
+                qty_messages = 0
+
+    def _store_responses(self, messages: Iterable[Message]) -> List[Message]:
+        """
+        Store received responses and wake up the callers waiting for them.
+
+        Args:
+            messages (iterable): The received responses.
+
+        Returns:
+            list: The stored responses.
+        """
+        received = list(messages)
+        request_ids = list(map(attrgetter("request_id"), received))
+        expires_at = time() + self._seconds_before_cleaning
+        with self._messages_lock:
+            self._messages.update(zip(request_ids, received))
+            self._expiry_order.extend((expires_at, request_id) for request_id in request_ids)
+            for request_id in request_ids:
+                waiter = self._waiters.pop(request_id, None)
+                if waiter is not None:
+                    waiter.set()
+        return received
+
+    def _cache_responses(self, messages: List[Message]):
+        """
+        Store received responses in the response cache, if one is configured.
+
+        Cached responses expire after the queue's message retention period. The cache may
+        block, e.g. on disk writes, so this runs off the receiving thread or event loop.
+
+        Args:
+            messages (list): The received responses.
+        """
+        try:
+            for message in messages:
+                self._response_cache.set(
+                    message.request_id, message, expire=self._message_retention_period
+                )
+        except Exception as e:
+            self._logger.exception(e)
+
+    def _delete_messages(self, messages: MessageList):
+        """
+        Delete received messages from the queue.
+
+        This runs on the delete workers so that the subscription thread can go back to
+        receiving messages without waiting for the deletion round-trip.
+
+        Args:
+            messages (MessageList): The messages to delete.
+        """
+        try:
+            failed = messages.delete()
+        except Exception as e:
+            self._logger.exception(e)
+            return
+        if failed:
+            self._logger.warning("Failed to delete reply messages: %s", failed)
 
     def _clean_old_messages(self):
         """
         Clean up old messages from the `_messages` dictionary.
 
         This method removes messages from the `_messages` dictionary that have exceeded the configured
-        time limit for cleaning.
-        """
-        messages_to_delete = []
-        for message in self._messages.values():
-            current_time = time()
-            diff = current_time - message.initial_time
-            if diff > self._seconds_before_cleaning:
-                messages_to_delete.append(message.request_id)
-        for request_id in messages_to_delete:
-            del self._messages[request_id]
+        time limit for cleaning. Only the expired messages are visited, oldest first.
+        """
+        now = time()
+        with self._messages_lock:
+            while self._expiry_order and self._expiry_order[0][0] < now:
+                _, request_id = self._expiry_order.popleft()
+                self._messages.pop(request_id, None)
+
+
+class AsyncReplyQueue(ReplyQueue):
+    """
+    A ReplyQueue that receives responses on an asyncio event loop instead of a dedicated thread.
+
+    Every AsyncReplyQueue in the process shares one event loop running in a background thread,
+    so an additional reply queue costs a coroutine rather than a thread. `get_response_by_id`
+    stays blocking. Requires aiobotocore; uvloop is used when it is installed.
+    """
+    def _start_sub_thread(self):
+        """
+        Schedule the subscription coroutine on the shared event loop.
+        """
+        self._sub_future = asyncio.run_coroutine_threadsafe(
+            self._subscribe_async(), _get_event_loop()
+        )
+
+    def _stop_sub_thread(self):
+        """
+        Cancel the subscription coroutine.
+        """
+        self._sub_future.cancel()
+
+    async def _subscribe_async(self):
+        """
+        Start receiving messages from the queue with an aiobotocore client.
+        """
+        from aiobotocore.session import get_session
+
+        try:
+            async with get_session().create_client(
+                "sqs", **self._connection.get_client_params()
+            ) as client:
+                await self._receive_messages_async(client)
+        except Exception as e:
+            error = e.__class__.__name__
+            if error != "QueueDoesNotExist" and self._queue_url:
+                self._logger.exception(e)
+
+    async def _receive_messages_async(self, client):
+        """
+        Receive and process messages from the queue.
+
+        Messages are long-polled and stored in the `_messages` dictionary. Each batch is deleted
+        in a background task, so the deletion overlaps the next receive call. Pending deletions
+        are awaited when receiving stops.
+
+        Args:
+            client: The aiobotocore SQS client.
+        """
+        queue_url = self._queue_url
+        qty_messages = 0
+        delete_tasks = set()
+        try:
+            while True:
+                response = await client.receive_message(
+                    QueueUrl=queue_url,
+                    MaxNumberOfMessages=10,
+                    MessageAttributeNames=["RequestMessageId"],
+                    WaitTimeSeconds=20,
+                )
+                messages = response.get("Messages", [])
+                if not messages:
+                    self._clean_old_messages()
+                    continue
+                qty_messages += len(messages)
+                received = self._store_responses(ResponseMessage(message) for message in messages)
+                if self._response_cache is not None:
+                    asyncio.get_running_loop().run_in_executor(None, self._cache_responses, received)
+                task = asyncio.create_task(self._delete_messages_async(client, queue_url, messages))
+                delete_tasks.add(task)
+                task.add_done_callback(delete_tasks.discard)
+                if qty_messages >= self._num_messages_before_cleaning:
+                    self._clean_old_messages()
+                    qty_messages = 0
+        finally:
+            # Let the pending deletions finish before the client is closed, even when cancelled.
+            if delete_tasks:
+                await asyncio.gather(*delete_tasks, return_exceptions=True)
+
+    async def _delete_messages_async(self, client, queue_url: str, messages: List[dict]):
+        """
+        Delete a batch of received messages with a single DeleteMessageBatch call.
+
+        Args:
+            client: The aiobotocore SQS client.
+            queue_url (str): The URL of the queue.
+            messages (list): The received messages.
+        """
+        try:
+            response = await client.delete_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": message["ReceiptHandle"]}
+                    for i, message in enumerate(messages)
+                ],
+            )
+        except Exception as e:
+            self._logger.exception(e)
+            return
+        if response.get("Failed"):
+            self._logger.warning("Failed to delete reply messages: %s", response["Failed"])
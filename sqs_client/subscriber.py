@@ -1,12 +1,32 @@
-from logging import exception
-from time import time
-from typing import List, Optional
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Full, Queue
+from threading import Event, Lock, Thread, Timer, local
+from time import monotonic
+from typing import Iterator, List, Optional, Set, Tuple, Union
 
-from sqs_client.contracts import MessageHandler
+from botocore.config import Config
+
+from sqs_client.connection import MAX_POOL_CONNECTIONS
+from sqs_client.contracts import BatchMessageHandler, MessageHandler
 from sqs_client.contracts import MessagePoller as MessagePollerBase
 from sqs_client.contracts import Publisher, SqsConnection
 from sqs_client.contracts import Subscriber as SubscriberBase
-from sqs_client.message import Message, MessageList, RequestMessage
+from sqs_client.message import (
+    AsyncMessageList,
+    ChainedMessageList,
+    Message,
+    MessageList,
+    RequestMessage,
+)
+
+__all__ = ["Subscriber", "AsyncSubscriber", "MessagePoller", "AsyncMessagePoller"]
+
+logger = logging.getLogger(__name__)
+
+# The attributes a MessagePoller needs to reply to a request message.
+_REQUEST_ATTRS = ("RequestMessageId", "ReplyTo")
 
 
 class Subscriber(SubscriberBase):
@@ -21,6 +41,8 @@ class Subscriber(SubscriberBase):
         queue_url: Optional[str]=None,
         max_number_of_messages: int=10,
         visibility_timeout: int=30,
+        wait_time_seconds: int=20,
+        num_pollers: int=1,
     ):
         """
         Initialize a Subscriber instance.
@@ -30,11 +52,51 @@ class Subscriber(SubscriberBase):
             queue_url (str, optional): The URL of the queue to receive messages from. Defaults to None.
             max_number_of_messages (int, optional): The maximum number of messages to receive in one batch. Defaults to 10.
             visibility_timeout (int, optional): The visibility timeout for received messages in seconds. Defaults to 30.
+            wait_time_seconds (int, optional): How long each receive call waits for messages (long polling).
+                It is lowered towards one second while full batches keep arriving quickly. Defaults to 20.
+            num_pollers (int, optional): The number of concurrent receive calls made by `stream`. Defaults to 1.
         """
         self._connection = sqs_connection
         self._queue_url = queue_url
         self._max_number_of_messages = max_number_of_messages
         self._visibility_timeout = visibility_timeout
+        self._wait_time_seconds = wait_time_seconds
+        self._num_pollers = num_pollers
+
+    @classmethod
+    def recommended_boto_config(
+        cls, num_pollers: int=1, wait_time_seconds: int=20, max_workers: int=10
+    ) -> Config:
+        """
+        Return a botocore Config suited to long polling subscribers.
+
+        Connections are kept alive, so that long polls reuse their TLS sessions, and throttling is retried
+        adaptively. Pass it as the `config` of the SqsConnection, or of the factories, the subscribers are
+        built with. The default config of SqsConnection also keeps connections alive and retries adaptively,
+        but with 5 attempts and a read timeout of 25 seconds, which only suits wait times up to 20 seconds.
+        The connection pool is never smaller than the default one, since the connection is shared by every
+        publisher, subscriber and reply queue built with it.
+
+        Args:
+            num_pollers (int, optional): The number of concurrent receive calls sharing the connection. Defaults to 1.
+            wait_time_seconds (int, optional): The long polling wait time of the subscribers. Defaults to 20.
+            max_workers (int, optional): The number of worker threads deleting messages and sending responses
+                with the connection, e.g. those of a MessagePoller. Defaults to 10.
+
+        Returns:
+            Config: The botocore config.
+        """
+        return Config(
+            tcp_keepalive=True,
+            retries={"mode": "adaptive", "max_attempts": 10},
+            max_pool_connections=max(MAX_POOL_CONNECTIONS, num_pollers + max_workers),
+            read_timeout=wait_time_seconds + 10,
+        )
+
+    @property
+    def visibility_timeout(self) -> int:
+        """The visibility timeout of the received messages in seconds."""
+        return self._visibility_timeout
 
     def set_queue(self, queue_url: str):
         """
@@ -45,29 +107,109 @@ class Subscriber(SubscriberBase):
         """
         self._queue_url = queue_url
 
-    def receive_messages(self, return_none: bool=False, message_attribute_names: List[str]=[]):
+    def receive_messages(
+        self,
+        return_none: bool=False,
+        message_attribute_names: Optional[List[str]]=None,
+        wait_time_seconds: Optional[int]=None,
+        max_number_of_messages: Optional[int]=None,
+    ):
         """
         Receive and yield messages from the queue.
 
         Args:
             return_none (bool, optional): Whether to yield None when no messages are available. Defaults to False.
-            message_attribute_names (list, optional): List of message attribute names to retrieve. Defaults to an empty list.
+            message_attribute_names (list, optional): List of message attribute names to retrieve. Defaults to None.
+            wait_time_seconds (int, optional): Overrides the subscriber's long polling wait time. Defaults to None.
+            max_number_of_messages (int, optional): Overrides the subscriber's batch size. Defaults to None.
 
         Yields:
             MessageList or None: Yields a MessageList instance containing received messages or None if return_none is True.
         """
+        # Built once and reused by every receive call of this generator.
+        params = {
+            "QueueUrl": self._queue_url,
+            "MaxNumberOfMessages": max_number_of_messages or self._max_number_of_messages,
+            "MessageAttributeNames": message_attribute_names or [],
+            "VisibilityTimeout": self._visibility_timeout,
+            "WaitTimeSeconds": (
+                self._wait_time_seconds if wait_time_seconds is None else wait_time_seconds
+            ),
+        }
+        client = self._connection.client
+        # A full batch received within a second means the queue is backed up, so the wait time
+        # moves towards one second to receive again sooner, and back once batches stop filling.
+        # Smoothed, so that a single full batch does not make the wait time swing.
+        base_wait = params["WaitTimeSeconds"]
+        busy_wait = min(base_wait, 1)
+        wait = base_wait
         while True:
-            messages = self._connection.client.receive_message(
-                QueueUrl=self._queue_url,
-                MaxNumberOfMessages=self._max_number_of_messages,
-                MessageAttributeNames=message_attribute_names,
-                VisibilityTimeout=self._visibility_timeout,
-                WaitTimeSeconds=20,
-            )
-            if "Messages" in messages:
-                yield MessageList(self._connection.client, self._queue_url, messages)
-            elif return_none:
-                yield None
+            start = monotonic()
+            response = client.receive_message(**params)
+            messages = response.get("Messages")
+            if not messages:
+                # Empty polls are the common case of an idle queue, so they skip the smoothing:
+                # nothing was waiting, so the queue is no longer backed up.
+                wait = base_wait
+                params["WaitTimeSeconds"] = base_wait
+                if return_none:
+                    yield None
+                continue
+            busy = len(messages) == params["MaxNumberOfMessages"] and monotonic() - start < 1.0
+            wait = 0.8 * wait + 0.2 * (busy_wait if busy else base_wait)
+            params["WaitTimeSeconds"] = round(wait)
+            yield MessageList(client, params["QueueUrl"], response)
+
+    def stream(
+        self, return_none: bool=False, message_attribute_names: Optional[List[str]]=None
+    ) -> Iterator[Optional[MessageList]]:
+        """
+        Receive and yield messages from the queue with several concurrent receive calls.
+
+        Each of the `num_pollers` threads long polls the queue with the shared client and hands its
+        batches over through a bounded buffer. The threads stop once the generator is closed; batches
+        still buffered then become visible again after the visibility timeout.
+
+        Args:
+            return_none (bool, optional): Whether to yield None when no messages are available. Defaults to False.
+            message_attribute_names (list, optional): List of message attribute names to retrieve. Defaults to None.
+
+        Yields:
+            MessageList or None: Yields a MessageList instance containing received messages or None if return_none is True.
+        """
+        if self._num_pollers == 1:
+            yield from self.receive_messages(return_none, message_attribute_names)
+            return
+
+        batches = Queue(maxsize=self._num_pollers)
+        stop_event = Event()
+
+        def poll():
+            try:
+                for messages in self.receive_messages(True, message_attribute_names):
+                    if stop_event.is_set():
+                        return
+                    if messages is None and not return_none:
+                        continue
+                    while not stop_event.is_set():
+                        try:
+                            batches.put(messages, timeout=1)
+                            break
+                        except Full:
+                            continue
+            except Exception as e:
+                batches.put(e)
+
+        for _ in range(self._num_pollers):
+            Thread(target=poll, daemon=True).start()
+        try:
+            while True:
+                messages = batches.get()
+                if isinstance(messages, Exception):
+                    raise messages
+                yield messages
+        finally:
+            stop_event.set()
 
     def chunk(self, num_messages: int=500, limit_seconds: int=30):
         """
@@ -78,7 +220,7 @@ class Subscriber(SubscriberBase):
             limit_seconds (int, optional): The time limit in seconds for each chunk. Defaults to 30.
 
         Yields:
-            MessageList: Yields a MessageList instance containing received messages based on conditions.
+            ChainedMessageList: Yields the received batches of a chunk, without copying their messages.
         
         Usage:
             sqs_config = ....
@@ -88,98 +230,629 @@ class Subscriber(SubscriberBase):
                     print(message.body)
                 messages.delete()
         """
-        if num_messages < 10:
-            self.max_number_of_messages = num_messages
-        messages_received = None
+        # Ask SQS for no more messages than a chunk needs, without changing the subscriber's setting.
+        max_number_of_messages = num_messages if num_messages < 10 else None
+        parts = []
         num = 0
-        start = time()
-        for message_list in self.receive_messages(return_none=True):
-            if not messages_received:
-                messages_received = message_list
-            elif message_list:
-                messages_received += message_list
-
-            num += 0 if not message_list else len(message_list)
-            now = time()
-            if messages_received and (
-                num >= num_messages or (now - start) >= limit_seconds
-            ):
-                yield messages_received
-                messages_received = None
+        start = monotonic()
+        for message_list in self.receive_messages(
+            return_none=True, max_number_of_messages=max_number_of_messages
+        ):
+            if message_list:
+                parts.append(message_list)
+                num += len(message_list)
+            if parts and (num >= num_messages or monotonic() - start >= limit_seconds):
+                yield ChainedMessageList(parts)
+                parts = []
                 num = 0
-                start = now
+                start = monotonic()
+
 
+class AsyncSubscriber:
+    """
+    A subscriber that receives messages with an aiobotocore client.
 
-class MessagePoller(MessagePollerBase):
+    A single event loop can run many long polls at once, instead of one thread per poll.
+    It must be entered with `async with` before receiving messages. Requires aiobotocore.
+    """
+    def __init__(
+        self,
+        sqs_connection: SqsConnection,
+        queue_url: Optional[str]=None,
+        max_number_of_messages: int=10,
+        visibility_timeout: int=30,
+        wait_time_seconds: int=20,
+    ):
+        """
+        Initialize an AsyncSubscriber instance.
+
+        Args:
+            sqs_connection (SqsConnection): The connection whose settings are used to build the client.
+            queue_url (str, optional): The URL of the queue to receive messages from. Defaults to None.
+            max_number_of_messages (int, optional): The maximum number of messages to receive in one batch. Defaults to 10.
+            visibility_timeout (int, optional): The visibility timeout for received messages in seconds. Defaults to 30.
+            wait_time_seconds (int, optional): How long each receive call waits for messages (long polling). Defaults to 20.
+        """
+        self._connection = sqs_connection
+        self._queue_url = queue_url
+        self._max_number_of_messages = max_number_of_messages
+        self._visibility_timeout = visibility_timeout
+        self._wait_time_seconds = wait_time_seconds
+        self._client_context = None
+        self._client = None
+
+    async def __aenter__(self):
+        from aiobotocore.session import get_session
+
+        self._client_context = get_session().create_client(
+            "sqs", **self._connection.get_client_params()
+        )
+        self._client = await self._client_context.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client_context.__aexit__(*exc_info)
+        self._client = None
+
+    @property
+    def visibility_timeout(self) -> int:
+        """The visibility timeout of the received messages in seconds."""
+        return self._visibility_timeout
+
+    def set_queue(self, queue_url: str):
+        """
+        Set the queue URL for the current instance.
+
+        Args:
+            queue_url (str): The URL of the queue to receive messages from.
+        """
+        self._queue_url = queue_url
+
+    async def receive_messages(self, return_none: bool=False, message_attribute_names: Optional[List[str]]=None):
+        """
+        Receive and yield messages from the queue.
+
+        Args:
+            return_none (bool, optional): Whether to yield None when no messages are available. Defaults to False.
+            message_attribute_names (list, optional): List of message attribute names to retrieve. Defaults to None.
+
+        Yields:
+            AsyncMessageList or None: The received messages, or None if return_none is True and none were received.
+        """
+        params = {
+            "QueueUrl": self._queue_url,
+            "MaxNumberOfMessages": self._max_number_of_messages,
+            "MessageAttributeNames": message_attribute_names or [],
+            "VisibilityTimeout": self._visibility_timeout,
+            "WaitTimeSeconds": self._wait_time_seconds,
+        }
+        client = self._client
+        while True:
+            response = await client.receive_message(**params)
+            if response.get("Messages"):
+                yield AsyncMessageList(client, params["QueueUrl"], response)
+            elif return_none:
+                yield None
+
+
+class _ErrorLogLimiter:
+    """
+    Logs the traceback of an error at most once per interval, and counts the repeated ones it skips.
+
+    Errors are considered repeated when they have the same log message and type, so a burst of bad
+    messages does not spend the poller's time formatting tracebacks.
+    """
+    def __init__(self, logger: logging.Logger, interval_seconds: float=1.0):
+        self._logger = logger
+        self._interval_seconds = interval_seconds
+        self._lock = Lock()
+        self._last_logged = {}
+        self._skipped = {}
+
+    def exception(self, msg: str, error: Exception):
+        key = (msg, error.__class__)
+        now = monotonic()
+        with self._lock:
+            last_logged = self._last_logged.get(key)
+            if last_logged is not None and now - last_logged < self._interval_seconds:
+                self._skipped[key] = self._skipped.get(key, 0) + 1
+                return
+            self._last_logged[key] = now
+            skipped = self._skipped.pop(key, 0)
+        if skipped:
+            self._logger.error("%s: %d similar errors were not logged", msg, skipped)
+        self._logger.exception(msg)
+
+
+class _VisibilityExtender:
+    """
+    Extends the visibility timeout of a batch every half timeout, until it is stopped.
+    """
+    def __init__(self, messages: MessageList, visibility_timeout: int, logger: logging.Logger):
+        self._messages = messages
+        self._visibility_timeout = visibility_timeout
+        self._logger = logger
+        self._lock = Lock()
+        self._timer = None
+        self._stopped = False
+
+    def start(self):
+        with self._lock:
+            if self._stopped:
+                return
+            self._timer = Timer(self._visibility_timeout / 2, self._extend)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._timer:
+                self._timer.cancel()
+
+    def _extend(self):
+        try:
+            for entry in self._messages.change_visibility(self._visibility_timeout):
+                self._logger.error("Error while trying to extend a message visibility: %s", entry)
+        except Exception as e:
+            self._logger.exception(e)
+        self.start()
+
+
+class _MessageProcessor:
+    """
+    The processing of received batches and the sending of their responses, shared by the pollers.
+    """
+    def __init__(
+        self,
+        handler: Union[MessageHandler, BatchMessageHandler],
+        subscriber,
+        publisher: Publisher,
+        request_message_class,
+        max_workers: int,
+        reuse_response_messages: bool,
+        visibility_timeout: Optional[int],
+    ):
+        subscriber_visibility_timeout = subscriber.visibility_timeout
+        if visibility_timeout is None:
+            visibility_timeout = subscriber_visibility_timeout
+        elif subscriber_visibility_timeout and visibility_timeout > subscriber_visibility_timeout:
+            # The first extension would come after the messages are visible again.
+            raise ValueError(
+                "visibility_timeout must not be larger than the subscriber's visibility timeout"
+                f" ({subscriber_visibility_timeout} seconds)"
+            )
+        self._visibility_timeout = visibility_timeout
+        self._subscriber = subscriber
+        self._publisher = publisher
+        self._request_message_class = request_message_class
+        self._handler = handler
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._stop_event = Event()
+        self._reuse_response_messages = reuse_response_messages
+        self._response_messages = local()
+        self._logger = logger
+        self._error_log = _ErrorLogLimiter(logger)
+
+    def stop(self):
+        """
+        Stop the poller after the batches already received have been processed.
+        """
+        self._stop_event.set()
+
+    def _handle_one(self, message: Message) -> Tuple[bool, Optional[str]]:
+        """
+        Process a single message.
+
+        Args:
+            message (Message): The message to process.
+
+        Returns:
+            tuple: Whether the message was processed, and its response.
+        """
+        try:
+            return True, self._handler.process_message(message)
+        except Exception as e:
+            self._error_log.exception("Error while trying to process a message", e)
+            return False, None
+
+    def _process_batch(
+        self, messages: Union[MessageList, AsyncMessageList]
+    ) -> Tuple[Set[str], List[Tuple[Message, str]]]:
+        """
+        Process the messages as a single batch.
+
+        If processing fails, none of the messages are deleted, so the whole batch is received again later.
+        The handler returns one response per message, or None when there are no responses.
+
+        Args:
+            messages (MessageList): The received messages.
+
+        Returns:
+            tuple: The ids of the messages whose processing failed, and the (message, response) pairs of the others.
+        """
+        batch = list(messages)
+        try:
+            responses = self._handler.process_messages(batch)
+            if responses is None:
+                return set(), []
+            if len(responses) != len(batch):
+                raise ValueError(
+                    f"The handler returned {len(responses)} responses for {len(batch)} messages"
+                )
+        except Exception as e:
+            self._error_log.exception("Error while trying to process a batch of messages", e)
+            return {message.id for message in batch}, []
+        return set(), list(zip(batch, responses))
+
+    def _send_responses(self, responses: List[Tuple[Message, Optional[str]]]) -> Set[str]:
+        """
+        Send the responses of a batch to their reply queues with as few requests as possible.
+
+        A message whose response could not be sent is not deleted, so it is received again later.
+
+        Args:
+            responses (list): The (message, response) pairs of the batch.
+
+        Returns:
+            set: The ids of the messages whose response could not be sent.
+        """
+        sources = []
+        response_messages = []
+        for message, response in responses:
+            if not response:
+                continue
+            reply_queue_url = message.reply_queue_url
+            if not reply_queue_url:
+                continue
+            request_message_id = message.request_id
+            if not request_message_id:
+                continue
+            response_message = self._build_response_message(
+                len(response_messages),
+                body=response,
+                queue_url=reply_queue_url,
+                message_attributes={
+                    "RequestMessageId": {"StringValue": request_message_id, "DataType": "String"}
+                },
+            )
+            sources.append(message)
+            response_messages.append(response_message)
+        if not response_messages:
+            return set()
+        try:
+            result = self._publisher.send_messages(response_messages)
+        except Exception:
+            failed_ids = {message.id for message in sources}
+            self._logger.exception("Error while trying to send the responses of messages %s", failed_ids)
+            return failed_ids
+        for entry in result["Failed"]:
+            self._logger.error("Error while trying to send a response: %s", entry)
+        return {sources[int(entry["Id"])].id for entry in result["Failed"]}
+
+    def _build_response_message(self, index: int, **kwargs) -> RequestMessage:
+        """
+        Build the response message at a given position of a batch, reusing the previous batch's one if enabled.
+
+        Args:
+            index (int): The position of the response in the batch.
+            **kwargs: The arguments of the request message class.
+
+        Returns:
+            RequestMessage: The response message.
+        """
+        if not self._reuse_response_messages:
+            return self._request_message_class(**kwargs)
+        pool = getattr(self._response_messages, "pool", None)
+        if pool is None:
+            pool = self._response_messages.pool = []
+        if index < len(pool):
+            pool[index].reset(**kwargs)
+        else:
+            pool.append(self._request_message_class(**kwargs))
+        return pool[index]
+
+
+class MessagePoller(_MessageProcessor, MessagePollerBase):
     """
     A class responsible for polling messages from a Subscriber, processing them using a MessageHandler,
     and sending responses using a Publisher.
 
     The MessagePoller class continuously polls messages from a Subscriber, processes them using a provided
     MessageHandler, and sends responses using a Publisher to the appropriate reply queue.
+    A BatchMessageHandler receives each batch of messages at once instead.
     """
     def __init__(
         self,
-        handler: MessageHandler,
+        handler: Union[MessageHandler, BatchMessageHandler],
         subscriber: Subscriber,
         publisher: Publisher,
         request_message_class=RequestMessage,
+        max_workers: int=10,
+        prefetch: int=2,
+        reuse_response_messages: bool=False,
+        visibility_timeout: Optional[int]=None,
     ):
         """
         Initialize a MessagePoller instance.
 
         Args:
-            handler (MessageHandler): An instance of the MessageHandler class for message processing.
+            handler (MessageHandler or BatchMessageHandler): The handler used for message processing.
             subscriber (Subscriber): An instance of the Subscriber class for receiving messages.
             publisher (Publisher): An instance of the Publisher class for sending responses.
             request_message_class (type, optional): The class used to create request messages. Defaults to RequestMessage.
+            max_workers (int, optional): The number of messages of a batch processed concurrently. Defaults to 10.
+            prefetch (int, optional): The number of received batches waiting to be processed. Defaults to 2.
+            reuse_response_messages (bool, optional): Whether the response messages of a batch are reset and reused
+                for the next batches instead of creating new ones. Only safe with a publisher that is done with the
+                messages when `send_messages` returns. Defaults to False.
+            visibility_timeout (int, optional): The visibility timeout the messages are extended to, every half timeout,
+                while a batch waits to be processed and is processed, so that slow handlers do not get their messages
+                received again. It must not be larger than the subscriber's visibility timeout. Defaults to None, the
+                subscriber's visibility timeout; no extension is done if the subscriber does not report one.
         """
-        self._subscriber = subscriber
-        self._publisher = publisher
-        self._request_message_class = request_message_class
-        self._handler = handler
+        super().__init__(
+            handler,
+            subscriber,
+            publisher,
+            request_message_class,
+            max_workers,
+            reuse_response_messages,
+            visibility_timeout,
+        )
+        self._batches = Queue(maxsize=prefetch)
+        self._receive_error = None
 
     def start(self):
         """
         Start the message polling and processing loop.
 
         This method continuously polls messages from the Subscriber, processes each message using the provided
-        MessageHandler, and sends responses back using the Publisher.
+        MessageHandler, and sends responses back using the Publisher. Messages are received by a separate thread
+        ahead of time, so the next batch is already being received while the current one is processed.
+        Returns once the poller is stopped. If processing a batch raises, receiving is stopped and the
+        batches already received are released, so that SQS delivers them again, before the error is raised.
         """
-        for messages in self._subscriber.receive_messages(
-            message_attribute_names=["RequestMessageId", "ReplyTo"]
-        ):
-            for message in messages:
+        self._stop_event.clear()
+        receiver = Thread(target=self._receive, daemon=True)
+        receiver.start()
+        received_all = False
+        try:
+            while True:
+                item = self._batches.get()
+                if item is None:
+                    received_all = True
+                    break
+                messages, extender = item
                 try:
-                    response = self._handler.process_message(message)
-                    self._send_response(message, response)
-                except Exception as e:
-                    exception("Error while trying to process a message")
-                    messages.remove(message.id)
-            messages.delete()
+                    if isinstance(self._handler, BatchMessageHandler):
+                        failed_ids, responses = self._process_batch(messages)
+                    else:
+                        failed_ids, responses = self._process_each(messages)
+                    failed_ids |= self._send_responses(responses)
+                finally:
+                    if extender:
+                        extender.stop()
+                messages.delete_except(failed_ids)
+        finally:
+            if not received_all:
+                self._stop_event.set()
+                self._release_batches()
+            receiver.join()
+        if self._receive_error:
+            raise self._receive_error
 
-    def _send_response(self, message: Message, response: Optional[str]=None):
+    def _release_batches(self):
         """
-        Send a response to the appropriate reply queue.
+        Stop extending the visibility of the batches buffered until the receiver stops, so that SQS
+        delivers them again.
+
+        Waits for the receiver to finish its current receive call and put its None.
+        """
+        while True:
+            item = self._batches.get()
+            if item is None:
+                return
+            _, extender = item
+            if extender:
+                extender.stop()
+
+    def _receive(self):
+        """
+        Receive batches of messages into the prefetch buffer until the poller is stopped.
+
+        Blocks while the buffer is full. A None is put in the buffer when receiving stops.
+        """
+        try:
+            for messages in self._subscriber.stream(
+                return_none=True, message_attribute_names=_REQUEST_ATTRS
+            ):
+                if self._stop_event.is_set():
+                    break
+                if messages is not None:
+                    self._batches.put((messages, self._extend_visibility(messages)))
+        except Exception as e:
+            self._receive_error = e
+        finally:
+            self._batches.put(None)
+
+    def _extend_visibility(self, messages: MessageList) -> Optional[_VisibilityExtender]:
+        """
+        Start extending the visibility timeout of a batch, if a visibility timeout is set.
 
         Args:
-            message (Message): The original received message.
-            response (str, optional): The response body to be sent. Defaults to None.
+            messages (MessageList): The received messages.
+
+        Returns:
+            _VisibilityExtender or None: The extender to stop once the batch has been processed.
         """
-        if not response:
-            return
-        reply_queue_url = message.reply_queue_url
-        if not reply_queue_url:
-            return
+        if not self._visibility_timeout:
+            return None
+        extender = _VisibilityExtender(messages, self._visibility_timeout, self._logger)
+        extender.start()
+        return extender
+
+    def _process_each(self, messages: MessageList) -> Tuple[Set[str], List[Tuple[Message, str]]]:
+        """
+        Process the messages of a batch concurrently, one per worker thread.
+
+        A message whose processing fails is not deleted, so it is received again later.
+
+        Args:
+            messages (MessageList): The received messages.
+
+        Returns:
+            tuple: The ids of the messages whose processing failed, and the (message, response) pairs of the others.
+        """
+        futures = {self._pool.submit(self._handle_one, message): message for message in messages}
+        failed_ids = set()
+        responses = []
+        for future in as_completed(futures):
+            message = futures[future]
+            processed, response = future.result()
+            if processed:
+                responses.append((message, response))
+            else:
+                failed_ids.add(message.id)
+        return failed_ids, responses
+
+
+class AsyncMessagePoller(_MessageProcessor):
+    """
+    A message poller that receives messages with an AsyncSubscriber.
+
+    Several consumers, each running its own long poll, share one event loop. The handler may define
+    `process_message` as a coroutine; otherwise messages are processed on the poller's worker threads.
+    The responses of a batch are sent on a worker thread with the given Publisher.
+    """
+    def __init__(
+        self,
+        handler: Union[MessageHandler, BatchMessageHandler],
+        subscriber: AsyncSubscriber,
+        publisher: Publisher,
+        request_message_class=RequestMessage,
+        max_workers: int=10,
+        reuse_response_messages: bool=False,
+        visibility_timeout: Optional[int]=None,
+    ):
+        """
+        Initialize an AsyncMessagePoller instance.
+
+        Args:
+            handler (MessageHandler or BatchMessageHandler): The handler used for message processing.
+            subscriber (AsyncSubscriber): The subscriber used to receive messages.
+            publisher (Publisher): An instance of the Publisher class for sending responses.
+            request_message_class (type, optional): The class used to create request messages. Defaults to RequestMessage.
+            max_workers (int, optional): The number of worker threads for sync handlers and responses. Defaults to 10.
+            reuse_response_messages (bool, optional): Whether the response messages of a batch are reset and reused
+                for the next batches instead of creating new ones. Only safe with a publisher that is done with the
+                messages when `send_messages` returns. Defaults to False.
+            visibility_timeout (int, optional): The visibility timeout the messages are extended to, every half timeout,
+                while a batch is processed. It must not be larger than the subscriber's visibility timeout.
+                Defaults to None, the subscriber's visibility timeout.
+        """
+        super().__init__(
+            handler,
+            subscriber,
+            publisher,
+            request_message_class,
+            max_workers,
+            reuse_response_messages,
+            visibility_timeout,
+        )
+
+    async def start(self, num_consumers: int=1):
+        """
+        Start the consumers and run them until the poller is stopped.
+
+        Args:
+            num_consumers (int, optional): The number of concurrent receive loops. Defaults to 1.
+        """
+        self._stop_event.clear()
+        async with self._subscriber:
+            await asyncio.gather(*(self._consume() for _ in range(num_consumers)))
+
+    async def _consume(self):
+        """
+        Receive, process and delete batches of messages until the poller is stopped.
+        """
+        loop = asyncio.get_running_loop()
+        async for messages in self._subscriber.receive_messages(
+            return_none=True, message_attribute_names=_REQUEST_ATTRS
+        ):
+            if self._stop_event.is_set():
+                break
+            if messages is None:
+                continue
+            extender = None
+            if self._visibility_timeout:
+                extender = asyncio.create_task(self._extend_visibility_async(messages))
+            try:
+                if isinstance(self._handler, BatchMessageHandler):
+                    failed_ids, responses = await loop.run_in_executor(
+                        self._pool, self._process_batch, messages
+                    )
+                else:
+                    failed_ids, responses = await self._process_each_async(messages)
+                failed_ids |= await loop.run_in_executor(self._pool, self._send_responses, responses)
+            finally:
+                if extender:
+                    extender.cancel()
+            await messages.delete_except(failed_ids)
+
+    async def _extend_visibility_async(self, messages: AsyncMessageList):
+        """
+        Extend the visibility timeout of a batch every half timeout, until cancelled.
+
+        Args:
+            messages (AsyncMessageList): The received messages.
+        """
+        while True:
+            await asyncio.sleep(self._visibility_timeout / 2)
+            try:
+                for entry in await messages.change_visibility(self._visibility_timeout):
+                    self._logger.error("Error while trying to extend a message visibility: %s", entry)
+            except Exception as e:
+                self._logger.exception(e)
+
+    async def _process_each_async(
+        self, messages: AsyncMessageList
+    ) -> Tuple[Set[str], List[Tuple[Message, str]]]:
+        """
+        Process the messages of a batch concurrently.
+
+        Args:
+            messages (AsyncMessageList): The received messages.
+
+        Returns:
+            tuple: The ids of the messages whose processing failed, and the (message, response) pairs of the others.
+        """
+        batch = list(messages)
+        results = await asyncio.gather(*(self._handle_one_async(message) for message in batch))
+        failed_ids = set()
+        responses = []
+        for message, (processed, response) in zip(batch, results):
+            if processed:
+                responses.append((message, response))
+            else:
+                failed_ids.add(message.id)
+        return failed_ids, responses
+
+    async def _handle_one_async(self, message: Message) -> Tuple[bool, Optional[str]]:
+        """
+        Process a single message.
+
+        Args:
+            message (Message): The message to process.
+
+        Returns:
+            tuple: Whether the message was processed, and its response.
+        """
+        if not asyncio.iscoroutinefunction(self._handler.process_message):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, self._handle_one, message)
         try:
-            response_message = self._request_message_class(
-                body=response,
-                queue_url=reply_queue_url,
-                message_attributes={
-                    "RequestMessageId": message.attributes["RequestMessageId"]
-                },
-            )
-            self._publisher.send_message(response_message)
+            return True, await self._handler.process_message(message)
         except Exception as e:
-            exception(e)
-            return
+            self._error_log.exception("Error while trying to process a message", e)
+            return False, None